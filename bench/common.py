@@ -0,0 +1,26 @@
+import os
+import sys
+import time
+
+## Benchmarks are run from the repository root, like the analyze script, so the grammar paths resolve
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+## Time a single call, returning its wall time in seconds and its result
+def timed(function, *args, **kwargs):
+	start = time.perf_counter()
+	result = function(*args, **kwargs)
+	return time.perf_counter() - start, result
+
+## Canonical form of a dependency graph so graphs built by different engines can be compared
+def graph_signature(graph) -> dict:
+	signature = {}
+	for node in graph:
+		signature[node] = sorted((adj.name, adj.ID, tuple(adj.labels), adj.alias) for adj in graph[node])
+	return signature
+
+## Print rows of equal length as an aligned table
+def print_table(header: list, rows: list):
+	widths = [max(len(str(value)) for value in column) for column in zip(header, *rows)]
+	for row in [header] + rows:
+		print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,42 @@
+## Compares the import-only fast scan with full extraction over a generated tree in which some files
+## have no imports at all and some import inside try and if TYPE_CHECKING blocks
+## Usage (from the repository root): python3 bench/fast_scan.py [modules] [lines]
+import os
+import sys
+import logging
+import tempfile
+from common import timed, print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+
+## Add modules of plain data, with no imports, and modules importing within module level blocks
+def add_modules(root: str, entry: str, count: int, lines: int):
+	with open(entry, 'a') as fd:
+		for index in range(count):
+			fd.write("import data{index}\nimport guarded{index}\n".format(index=index))
+	for index in range(count):
+		with open(os.path.join(root, "data{index}.py".format(index=index)), 'w') as fd:
+			fd.write("TABLE = [\n" + "".join("    ({line}, 'value {line}'),\n".format(line=line) for line in range(lines)) + "]\n")
+		with open(os.path.join(root, "guarded{index}.py".format(index=index)), 'w') as fd:
+			fd.write("from typing import TYPE_CHECKING\ntry:\n    import m0\nexcept ImportError:\n    m0 = None\n")
+			fd.write("if TYPE_CHECKING:\n    from data{index} import TABLE\n".format(index=index))
+			fd.write("".join("def f{line}(x):\n    return x + {line}\n".format(line=line) for line in range(lines // 2)))
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	lines = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+	with tempfile.TemporaryDirectory() as root:
+		entry = generate_tree(root, modules=modules, lines=lines, depth=2)
+		add_modules(root, entry, modules // 4, lines)
+
+		rows = []
+		for title, fast_scan in [("full parse", False), ("fast scan", True)]:
+			analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=False, fast_scan=fast_scan))
+			elapsed, _ = timed(analyzer.process, root, entry)
+			rows.append([title, "{:.3f}".format(elapsed), len(analyzer.graph), analyzer.graph.edge_count()])
+
+		print("{modules} modules plus {extra} data and {extra} guarded modules, {lines} lines each".format(modules=modules, extra=modules // 4, lines=lines))
+		print_table(["extraction", "seconds", "nodes", "edges"], rows)
+
+if __name__ == "__main__":
+	main()
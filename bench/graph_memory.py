@@ -0,0 +1,63 @@
+## Compares the memory used per edge by the original dict-of-sets graph and the compact DependencyGraph
+## Usage (from the repository root): python3 bench/graph_memory.py [nodes] [edges]
+import sys
+import random
+import tracemalloc
+from common import print_table
+from graph import DependencyGraph, Node, label_flags
+
+## Random edges shaped like an import graph: (src, dst, name, alias, labels)
+def generate_edges(nodes: int, edges: int, seed=0) -> list:
+	rng = random.Random(seed)
+	paths = ["pkg{group}/module{index}.py".format(group=index % 50, index=index) for index in range(nodes)]
+	result = []
+	for _ in range(edges):
+		src, dst = rng.choice(paths), rng.choice(paths)
+		name = dst[:-3].replace("/", ".")
+		labels = ["unused"] if rng.random() < 0.1 else []
+		result.append((src, dst, name, name, labels))
+	return result
+
+## Graph as built before the compact backend: node ID -> set of Node objects
+def build_sets(edges: list):
+	graph = {}
+	for src, dst, name, alias, labels in edges:
+		graph.setdefault(src, set()).add(Node(name=name, ID=dst, labels=list(labels), alias=alias))
+		graph.setdefault(dst, set())
+	return graph
+
+## Frozen compact graph, with each source's edges added together as the walk adds a file's imports
+def build_compact(edges: list):
+	graph = DependencyGraph()
+	keys, previous = None, None
+	for src, dst, name, alias, labels in sorted(edges, key=lambda edge: edge[0]):
+		if src != previous:
+			keys, previous = {}, src
+		graph.add_edge(src, name, dst, alias, label_flags(labels), keys)
+	graph.freeze()
+	return graph
+
+## Bytes allocated by a builder and still held by its result, and the most it held at once while building
+def measure(builder, edges: list):
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	graph = builder(edges)
+	after, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return after - before, peak - before, graph
+
+def main():
+	nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+	edge_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+	edges = generate_edges(nodes, edge_count)
+
+	rows = []
+	for title, builder in [("dict of Node sets", build_sets), ("compact CSR", build_compact)]:
+		size, peak, graph = measure(builder, edges)
+		rows.append([title, size, "{:.1f}".format(size / edge_count), "{:.1f}".format(peak / edge_count)])
+		del graph
+	print("{nodes} nodes, {edges} edges".format(nodes=nodes, edges=edge_count))
+	print_table(["representation", "bytes", "bytes/edge", "peak bytes/edge"], rows)
+
+if __name__ == "__main__":
+	main()
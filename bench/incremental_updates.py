@@ -0,0 +1,78 @@
+## Measures how quickly the daemon picks up a single-file edit on its next poll and answers a query, and checks that the graph
+## it keeps up to date matches a fresh analysis of the edited directory
+## Usage (from the repository root): python3 bench/incremental_updates.py [modules] [edits]
+import os
+import sys
+import json
+import random
+import logging
+import tempfile
+from common import timed, graph_signature, print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+from daemon import AnalyzerDaemon
+
+## Remove an import line from a file, or put back one removed earlier, so that its imports change
+def edit(filepath: str, removed: dict, rng: random.Random):
+	with open(filepath, 'r') as fd:
+		lines = fd.readlines()
+	if removed.get(filepath) and rng.random() < 0.5:
+		lines.insert(0, removed[filepath].pop())
+	else:
+		imports = [index for index, line in enumerate(lines) if line.startswith(("import ", "from "))]
+		if not imports:
+			lines.append("import json\n")
+		else:
+			removed.setdefault(filepath, []).append(lines.pop(rng.choice(imports)))
+	with open(filepath, 'w') as fd:
+		fd.writelines(lines)
+
+## Signature of the files and libraries which import anything, since the daemon keeps nodes whose importers went away
+def live_signature(graph) -> dict:
+	return {node: edges for node, edges in graph_signature(graph).items() if edges}
+
+## Poll as the daemon's timer does, then answer a request, which is what a client waits for after a save
+def poll_and_answer(daemon: AnalyzerDaemon, request: bytes) -> dict:
+	daemon.poll()
+	return daemon.handle_request(request)
+
+def percentile(values: list, share: float) -> float:
+	return sorted(values)[min(len(values) - 1, int(share * len(values)))]
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+	edits = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+	rng = random.Random(0)
+	with tempfile.TemporaryDirectory() as root:
+		generate_tree(root, modules=modules, lines=100, depth=1)
+		paths = sorted(os.path.join(directory, name) for directory, _, names in os.walk(root) for name in names if name[:1] == "m")
+		config = Config(logging_level=logging.ERROR, render_graph=False, mark_unused=True)
+		daemon = AnalyzerDaemon(DependencyAnalyzer(config), root, os.path.join(root, "daemon.sock"))
+		build_time, _ = timed(daemon.build)
+
+		idle = [timed(daemon.handle_request, b'{"command": "status"}')[0] for _ in range(20)]
+		idle_polls = [timed(daemon.poll)[0] for _ in range(20)]
+		removed, latencies = {}, []
+		for _ in range(edits):
+			filepath = rng.choice(paths)
+			edit(filepath, removed, rng)
+			request = json.dumps({"command": "importers", "path": filepath}).encode('utf8')
+			elapsed, reply = timed(poll_and_answer, daemon, request)
+			assert reply["ok"], reply
+			latencies.append(elapsed)
+
+		fresh = DependencyAnalyzer(config)
+		fresh.process_directory(root)
+		graph = daemon.analyzer.graph
+		print("{modules} modules, {edits} edits, {columns} edge columns for {edges} live edges, graphs match: {match}".format(
+			modules=modules, edits=edits, columns=len(graph.edge_src), edges=graph.edge_count(),
+			match=live_signature(graph) == live_signature(fresh.graph)))
+		print_table(["operation", "median ms", "p95 ms", "max ms"], [
+			["initial build", "{:.1f}".format(1000 * build_time), "-", "-"],
+			["query, nothing changed", "{:.2f}".format(1000 * percentile(idle, 0.5)), "{:.2f}".format(1000 * percentile(idle, 0.95)), "{:.2f}".format(1000 * max(idle))],
+			["poll, nothing changed", "{:.2f}".format(1000 * percentile(idle_polls, 0.5)), "{:.2f}".format(1000 * percentile(idle_polls, 0.95)), "{:.2f}".format(1000 * max(idle_polls))],
+			["poll and query after an edit", "{:.2f}".format(1000 * percentile(latencies, 0.5)), "{:.2f}".format(1000 * percentile(latencies, 0.95)), "{:.2f}".format(1000 * max(latencies))],
+		])
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,56 @@
+## Measures the size of the rendered graph and the time to summarize it under each rendering option,
+## and the graphviz layout time too if the dot binary is installed
+## Usage (from the repository root): python3 bench/large_graphs.py [modules]
+import io
+import os
+import sys
+import shutil
+import logging
+import tempfile
+import subprocess
+from common import timed, print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+import rendering
+
+OPTIONS = [
+	("every file", {}),
+	("libraries hidden", {"hide_libraries": True}),
+	("clustered at depth 2", {"cluster_depth": 2}),
+	("clustered at depth 1, one subtree focused", {"cluster_depth": 1, "focus": ["p1/p5"]}),
+	("budget of 200 nodes", {"max_nodes": 200}),
+]
+
+## Seconds dot takes to lay out a DOT graph, or None if graphviz is not installed
+def layout_time(text: str):
+	if shutil.which("dot") is None:
+		return None
+	elapsed, _ = timed(subprocess.run, ["dot", "-Tsvg", "-o", "/dev/null"], input=text.encode('utf8'), check=True)
+	return elapsed
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+	with tempfile.TemporaryDirectory() as root:
+		generate_tree(root, modules=modules, lines=20, depth=3, branching=4)
+		analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=False, fast_scan=True))
+		cwd = os.getcwd()
+		os.chdir(root) # Analyze with relative paths, so that cluster depths count from the tree's root
+		try:
+			analyzer.process_directory(".")
+		finally:
+			os.chdir(cwd)
+
+		rows = []
+		for title, options in OPTIONS:
+			elapsed, summary = timed(rendering.summarize, analyzer.graph, **options)
+			stream = io.StringIO()
+			rendering.write_summary_dot(summary, stream)
+			layout = layout_time(stream.getvalue())
+			rows.append([title, len(summary.groups), len(summary.edges), len(stream.getvalue()), "{:.3f}".format(elapsed),
+				"-" if layout is None else "{:.3f}".format(layout)])
+
+		print("{nodes} nodes, {edges} edges".format(nodes=len(analyzer.graph), edges=analyzer.graph.edge_count()))
+		print_table(["rendering", "nodes", "edges", "DOT bytes", "summarize s", "layout s"], rows)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,34 @@
+## Compares processing many entry files one at a time with processing them against one shared graph
+## Usage (from the repository root): python3 bench/many_entries.py [modules] [entries]
+import os
+import sys
+import random
+import logging
+import tempfile
+from common import timed, print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+	entries = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+	rng = random.Random(0)
+	with tempfile.TemporaryDirectory() as root:
+		generate_tree(root, modules=modules, lines=100, depth=1)
+		paths = sorted(os.path.join(directory, name) for directory, _, names in os.walk(root) for name in names if name[:1] == "m")
+		filepaths = rng.sample(paths, min(entries, len(paths)))
+
+		rows = []
+		analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=False, stats="table"))
+		elapsed, _ = timed(lambda: [analyzer.process(root, filepath) for filepath in filepaths])
+		rows.append(["process per entry", "{:.3f}".format(elapsed), analyzer.stats.counters["files_parsed"]])
+
+		analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=False, stats="table"))
+		elapsed, _ = timed(analyzer.process_many, root, filepaths)
+		rows.append(["process_many", "{:.3f}".format(elapsed), analyzer.stats.counters["files_parsed"]])
+
+		print("{entries} entries in a tree of {modules} modules".format(entries=len(filepaths), modules=modules))
+		print_table(["analysis", "seconds", "files parsed"], rows)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,33 @@
+## Measures how the parallel engine scales with the number of parser processes
+## Usage (from the repository root): python3 bench/parallel_scaling.py [modules] [lines]
+import sys
+import tempfile
+import logging
+from common import timed, graph_signature, print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	lines = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+	with tempfile.TemporaryDirectory() as root:
+		entry = generate_tree(root, modules=modules, lines=lines)
+
+		rows = []
+		baseline_time, baseline_signature = None, None
+		for jobs in WORKER_COUNTS:
+			config = Config(logging_level=logging.ERROR, render_graph=False, mark_unused=True, jobs=jobs)
+			analyzer = DependencyAnalyzer(config)
+			elapsed, _ = timed(analyzer.process, root, entry)
+			signature = graph_signature(analyzer.graph)
+			if baseline_time is None:
+				baseline_time, baseline_signature = elapsed, signature
+			rows.append([jobs, "{:.3f}".format(elapsed), "{:.2f}x".format(baseline_time / elapsed), signature == baseline_signature])
+
+		print("{modules} modules, {lines} lines each".format(modules=modules, lines=lines))
+		print_table(["jobs", "seconds", "speedup", "same graph"], rows)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,49 @@
+## Measures building the reachability index and answering queries from it, checked against a breadth-first search
+## Usage (from the repository root): python3 bench/reachability.py [modules] [queries]
+import sys
+import random
+import logging
+import tempfile
+from common import timed, print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+
+## Every node reachable from ID, found by breadth-first search over the graph
+def search(graph, ID: str) -> set:
+	seen, frontier = set(), [ID]
+	while frontier:
+		frontier = [target for node in frontier for target in graph.successors(node) if target not in seen]
+		seen.update(frontier)
+	return seen
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	queries = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+	rng = random.Random(0)
+	with tempfile.TemporaryDirectory() as root:
+		generate_tree(root, modules=modules, lines=20, depth=2, cycle_density=0.02)
+		# Walk breadth first in worker processes, since a serial walk of a long import chain recurses deeply
+		analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=False, fast_scan=True, jobs=2))
+		analyzer.process_directory(root)
+		IDs = list(analyzer.graph)
+
+		build_time, index = timed(analyzer.reachability)
+		pairs = [(rng.choice(IDs), rng.choice(IDs)) for _ in range(queries)]
+		query_time, answers = timed(analyzer.depends_on, pairs)
+		sample = rng.sample(IDs, min(200, len(IDs)))
+		closure_time, closures = timed(analyzer.transitive_dependencies, sample)
+		search_time, searches = timed(lambda: {ID: search(analyzer.graph, ID) for ID in sample})
+		reverse_time, _ = timed(analyzer.transitive_dependents, sample)
+
+		print("{nodes} nodes, {edges} edges, {components} components, closures match search: {match}".format(
+			nodes=len(IDs), edges=analyzer.graph.edge_count(), components=len(index.components), match=closures == searches))
+		print_table(["operation", "count", "seconds", "per second"], [
+			["build index", 1, "{:.3f}".format(build_time), "-"],
+			["depends_on", queries, "{:.3f}".format(query_time), "{:.0f}".format(queries / query_time)],
+			["dependencies", len(sample), "{:.3f}".format(closure_time), "{:.0f}".format(len(sample) / closure_time)],
+			["dependents", len(sample), "{:.3f}".format(reverse_time), "{:.0f}".format(len(sample) / reverse_time)],
+			["breadth-first search", len(sample), "{:.3f}".format(search_time), "{:.0f}".format(len(sample) / search_time)],
+		])
+
+if __name__ == "__main__":
+	main()
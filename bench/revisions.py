@@ -0,0 +1,66 @@
+## Compares analyzing a series of git revisions with extraction memoized by blob against extracting every revision afresh
+## Usage (from the repository root): python3 bench/revisions.py [modules] [revisions] [changed files per revision]
+import os
+import sys
+import random
+import logging
+import tempfile
+import subprocess
+from common import timed, graph_signature, print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+from revision import RevisionAnalysis
+
+def git(root: str, *args):
+	subprocess.run(["git", "-C", root] + list(args), stdout=subprocess.DEVNULL, check=True)
+
+## Commit the generated tree, then a series of commits each appending a line to a few modules
+def build_history(root: str, revisions: int, changes: int, rng: random.Random) -> list:
+	git(root, "init", "-q")
+	git(root, "add", "-A")
+	git(root, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", "tree")
+	paths = sorted(os.path.join(directory, name) for directory, _, names in os.walk(root) if ".git" not in directory for name in names)
+	for revision in range(1, revisions):
+		for path in rng.sample(paths, changes):
+			with open(path, 'a') as fd:
+				fd.write("revision_{revision} = {revision}\n".format(revision=revision))
+		git(root, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-a", "-m", str(revision))
+	return ["HEAD~{count}".format(count=count) for count in reversed(range(revisions))]
+
+## Analyze every revision with one analysis, or with a fresh one per revision, returning the graph of each
+def analyze(root: str, revisions: list, shared: bool) -> tuple:
+	config = Config(logging_level=logging.ERROR, render_graph=False, mark_unused=True, stats="table")
+	analyzer = DependencyAnalyzer(config)
+	analysis = RevisionAnalysis(analyzer, root)
+	signatures = []
+	for revision in revisions:
+		if not shared:
+			analysis.close()
+			analysis = RevisionAnalysis(analyzer, root)
+		analysis.checkout(revision)
+		analyzer.process(".", "./main.py")
+		signatures.append(graph_signature(analyzer.graph))
+	analysis.close()
+	return analyzer.stats.counters["files_parsed"], signatures
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+	revisions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+	changes = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+	rng = random.Random(0)
+	with tempfile.TemporaryDirectory() as root:
+		generate_tree(root, modules=modules, lines=100, depth=1)
+		revision_names = build_history(root, revisions, changes, rng)
+
+		fresh_time, (fresh_parsed, fresh_signatures) = timed(analyze, root, revision_names, False)
+		shared_time, (shared_parsed, shared_signatures) = timed(analyze, root, revision_names, True)
+
+		print("{revisions} revisions of {modules} modules, {changes} changed per revision, graphs match: {match}".format(
+			revisions=revisions, modules=modules, changes=changes, match=fresh_signatures == shared_signatures))
+		print_table(["analysis", "seconds", "files parsed"], [
+			["fresh per revision", "{:.3f}".format(fresh_time), fresh_parsed],
+			["memoized by blob", "{:.3f}".format(shared_time), shared_parsed],
+		])
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,54 @@
+## Measures how prefetching hides read latency, with every read delayed to simulate a slow network filesystem,
+## and that a warm import cache leaves nothing to read ahead
+## Usage (from the repository root): python3 bench/slow_reads.py [modules] [latency_ms]
+import sys
+import time
+import logging
+import tempfile
+from common import timed, graph_signature, print_table
+from synthetic import generate_tree
+import extractor
+import prefetch
+from analyzer import DependencyAnalyzer, Config
+
+THREAD_COUNTS = [0, 2, 8, 32]
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+	latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+
+	reads = [0]
+	## Read a file after waiting as long as a slow filesystem would
+	def delayed_read(filepath: str) -> bytes:
+		reads[0] += 1
+		time.sleep(latency)
+		return prefetch.read_file(filepath)
+	extractor.read_file = delayed_read # Reads made without a prefetcher
+
+	with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as cache_dir:
+		entry = generate_tree(root, modules=modules, lines=100, depth=2)
+
+		rows = []
+		baseline_time, baseline_signature = None, None
+		# The last two runs fill the import cache and then analyze again with it warm
+		for threads, cached in [(threads, None) for threads in THREAD_COUNTS] + [(8, "cold cache"), (8, "warm cache")]:
+			analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=True, prefetch=threads, stats="table",
+			                                     cache_dir=cache_dir if cached else None))
+			if analyzer.prefetcher:
+				analyzer.prefetcher.read = delayed_read
+			reads[0] = 0
+			elapsed, _ = timed(analyzer.process, root, entry)
+			signature = graph_signature(analyzer.graph)
+			if baseline_time is None:
+				baseline_time, baseline_signature = elapsed, signature
+			counters = analyzer.stats.counters
+			rows.append([threads, cached or "-", "{:.3f}".format(elapsed), "{:.2f}x".format(baseline_time / elapsed), reads[0],
+			             counters["prefetch_hits"], counters["prefetch_waits"], counters["prefetch_misses"], signature == baseline_signature])
+			if analyzer.prefetcher:
+				analyzer.prefetcher.close()
+
+		print("{modules} modules, {latency:.1f} ms per read".format(modules=modules, latency=1000 * latency))
+		print_table(["threads", "import cache", "seconds", "speedup", "reads", "hits", "waits", "misses", "same graph"], rows)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,74 @@
+## Compares byte-level import extraction with the original pipeline, which decoded every file, encoded it
+## again for tree-sitter and sliced identifiers out of a list of lines, for throughput and peak memory
+## Usage (from the repository root): python3 bench/source_handling.py [modules] [lines]
+import os
+import sys
+import tempfile
+import tracemalloc
+from common import timed, print_table
+from synthetic import generate_tree
+from parser import Parser
+from extractor import Extractor, File
+
+## The original extraction, with a str, a bytes and a list of lines per file and identifiers rebuilt from points
+class LegacyExtractor(Extractor):
+	def extract_string(self, tree_sitter_node, lines: list) -> str:
+		startline, startidx = tree_sitter_node.start_point
+		endline, endidx = tree_sitter_node.end_point
+		if startline == endline:
+			return lines[startline][startidx:endidx]
+		substring_list = [lines[startline][startidx:]] + lines[startline + 1:endline] + [lines[endline][:endidx]]
+		return "".join(substring_list)
+
+	def extract_dotted_name(self, dotted_name_node, lines: list) -> str:
+		return "".join("." if child.type == "." else self.extract_string(child, lines) for child in dotted_name_node.children)
+
+	def extract_file(self, filepath: str, mark_unused: bool) -> list:
+		with open(filepath, 'r') as fd:
+			contents = fd.read()
+		tree = self.parser.parse_bytes(bytes(contents, 'utf8'))
+		file = File(filepath, contents.splitlines(True))    # File.source holds the lines here
+		imports = []
+		for node in tree.root_node.children:
+			if self.is_import(node):
+				imports += self.extract_import(file, node)
+		return imports
+
+## Extract the imports of every file, keeping the results like the analyzer does
+def extract_all(extractor: Extractor, paths: list) -> list:
+	results = []
+	for path in paths:
+		file_imports = extractor.extract_file(path, False)
+		results.append(file_imports if isinstance(file_imports, list) else file_imports.imports)
+	return results
+
+## Wall time of one pass, and peak traced memory of a separate pass
+def measure(extractor: Extractor, paths: list):
+	elapsed, results = timed(extract_all, extractor, paths)
+	tracemalloc.start()
+	extract_all(extractor, paths)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return elapsed, peak, [[raw_import.to_list() for raw_import in imports] for imports in results]
+
+def main():
+	modules = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	lines = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+	parser = Parser()
+	with tempfile.TemporaryDirectory() as root:
+		generate_tree(root, modules=modules, lines=lines, depth=2)
+		paths = [os.path.join(directory, name) for directory, _, names in os.walk(root) for name in names if name.endswith(".py")]
+		size = sum(os.path.getsize(path) for path in paths)
+
+		rows, outputs = [], []
+		for title, extractor in [("lines", LegacyExtractor(parser)), ("bytes", Extractor(parser))]:
+			extract_all(extractor, paths) # Warm the page cache
+			elapsed, peak, output = measure(extractor, paths)
+			outputs.append(output)
+			rows.append([title, "{:.3f}".format(elapsed), "{:.1f}".format(size / elapsed / 2**20), "{:.1f}".format(peak / 2**20)])
+
+		print("{files} files, {size:.1f} MiB, same imports: {same}".format(files=len(paths), size=size / 2**20, same=outputs[0] == outputs[1]))
+		print_table(["source", "seconds", "MiB/s", "peak MiB"], rows)
+
+if __name__ == "__main__":
+	main()
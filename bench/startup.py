@@ -0,0 +1,44 @@
+## Measures time to first output of the analyze command, cold (empty caches) and warm
+## Usage (from the repository root): python3 bench/startup.py [runs]
+import os
+import sys
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from common import ROOT, print_table
+
+COMMAND = [sys.executable, os.path.join(ROOT, "src", "main.py"), "test", "test/foo.py"]
+
+## Seconds from process start until the first line appears on stdout, and until exit
+def time_to_first_output(env: dict):
+	start = time.perf_counter()
+	process = subprocess.Popen(COMMAND, cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+	process.stdout.readline()
+	first_output = time.perf_counter() - start
+	process.communicate()
+	return first_output, time.perf_counter() - start
+
+def main():
+	runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+	cache_home = tempfile.mkdtemp()
+	env = dict(os.environ, XDG_CACHE_HOME=cache_home)
+	try:
+		rows = []
+		cold = [time_to_first_output(env)]
+		for _ in range(runs - 1):
+			shutil.rmtree(cache_home)
+			os.makedirs(cache_home)
+			cold.append(time_to_first_output(env))
+		warm = [time_to_first_output(env) for _ in range(runs)]
+		for title, samples in [("cold", cold), ("warm", warm)]:
+			rows.append([title, "{:.1f}".format(1000 * statistics.median(sample[0] for sample in samples)),
+			             "{:.1f}".format(1000 * statistics.median(sample[1] for sample in samples))])
+		print("median of {runs} runs of {command}".format(runs=runs, command=" ".join(COMMAND[1:])))
+		print_table(["start", "first output (ms)", "exit (ms)"], rows)
+	finally:
+		shutil.rmtree(cache_home, ignore_errors=True)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,153 @@
+## Times each phase of an analysis of a synthetic tree and records wall time and peak memory as JSON,
+## optionally comparing against a stored baseline and failing when a phase regressed
+## Usage (from the repository root): python3 bench/suite.py [--output results.json] [--baseline bench/baseline.json]
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from common import print_table
+from synthetic import generate_tree
+from analyzer import DependencyAnalyzer, Config
+
+PHASES = ["process", "mark_unused", "dependency_paths", "render"]
+
+# The serial walk recurses once per link of an import chain, which in a generated tree of a thousand modules
+# runs deeper than the default limit
+RECURSION_LIMIT = 10000
+
+## Wall time and peak traced memory of a call; tracing is only enabled when measuring memory
+## since it slows the traced code down considerably
+def measure(function, trace_memory: bool):
+	if trace_memory:
+		tracemalloc.start()
+	start = time.perf_counter()
+	with contextlib.redirect_stdout(io.StringIO()):
+		result = function()
+	elapsed = time.perf_counter() - start
+	peak = 0
+	if trace_memory:
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	return elapsed, peak, result
+
+## One measurement of every phase on the generated tree
+def run_phases(root: str, entry: str, max_paths: int, trace_memory: bool) -> dict:
+	results = {}
+	analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=False))
+	results["process"] = measure(lambda: analyzer.process(root, entry), trace_memory)[:2]
+
+	# Marking unused imports happens while processing, so it is timed as the extra cost over plain processing
+	analyzer = DependencyAnalyzer(Config(logging_level=logging.ERROR, render_graph=False, mark_unused=True, headless=True))
+	elapsed, peak, _ = measure(lambda: analyzer.process(root, entry), trace_memory)
+	results["mark_unused"] = (max(0.0, elapsed - results["process"][0]), peak)
+
+	def walk_paths():
+		count = analyzer.count_dependency_paths(entry)
+		for _ in analyzer.dependency_paths(entry, max_count=max_paths):
+			pass
+		return count
+	elapsed, peak, path_count = measure(walk_paths, trace_memory)
+	results["dependency_paths"] = (elapsed, peak)
+
+	# Rendering as -g --headless does, summarizing the graph and writing dependency_graph.gv into the tree
+	def render():
+		cwd = os.getcwd()
+		os.chdir(root)
+		try:
+			analyzer.render_graph()
+		finally:
+			os.chdir(cwd)
+	results["render"] = measure(render, trace_memory)[:2]
+	return results, {"nodes": len(analyzer.graph), "edges": analyzer.graph.edge_count(), "paths": path_count}
+
+## Best time of several runs per phase, and peak memory from one separate traced run
+def run_suite(args) -> dict:
+	sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+	tree = {
+		"modules": args.modules, "depth": args.depth, "fanout": args.fanout,
+		"cycle_density": args.cycle_density, "lines": args.lines, "seed": args.seed,
+	}
+	with tempfile.TemporaryDirectory() as root:
+		entry = generate_tree(root, **tree)
+		timings = [run_phases(root, entry, args.max_paths, False)[0] for _ in range(args.repeat)]
+		memory, graph = run_phases(root, entry, args.max_paths, True)
+
+	phases = {}
+	for phase in PHASES:
+		phases[phase] = {"seconds": min(timing[phase][0] for timing in timings), "peak_bytes": memory[phase][1]}
+	return {
+		"python": platform.python_version(),
+		"machine": platform.machine(),
+		"tree": tree,
+		"graph": graph,
+		"repeat": args.repeat,
+		"phases": phases,
+	}
+
+## Phases whose time or peak memory grew by more than the threshold over the baseline
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+	regressions = []
+	for phase, measured in results["phases"].items():
+		expected = baseline["phases"].get(phase)
+		if not expected:
+			continue
+		for metric in ["seconds", "peak_bytes"]:
+			if expected[metric] and measured[metric] > expected[metric] * (1 + threshold):
+				regressions.append((phase, metric))
+	return regressions
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark each analyzer phase on a synthetic tree.")
+	parser.add_argument("--modules", type=int, default=1000, help="number of modules")
+	parser.add_argument("--depth", type=int, default=2, help="package nesting depth")
+	parser.add_argument("--fanout", type=int, default=6, help="imports per module")
+	parser.add_argument("--cycle_density", type=float, default=0.05, help="chance that an import points forward and may close a cycle")
+	parser.add_argument("--lines", type=int, default=200, help="approximate lines per module")
+	parser.add_argument("--seed", type=int, default=0, help="random seed of the generator")
+	parser.add_argument("--max_paths", type=int, default=10000, help="dependency paths to enumerate")
+	parser.add_argument("--repeat", type=int, default=3, help="timed runs per phase, the best is kept")
+	parser.add_argument("--output", help="write results as JSON to this file")
+	parser.add_argument("--baseline", help="compare against results previously written with --output")
+	parser.add_argument("--threshold", type=float, default=0.2, help="relative growth over the baseline reported as a regression")
+	args = parser.parse_args()
+
+	results = run_suite(args)
+	baseline = None
+	if args.baseline:
+		with open(args.baseline, 'r') as fd:
+			baseline = json.load(fd)
+		if baseline.get("tree") != results["tree"]:
+			print("warning: baseline was recorded on a different tree", file=sys.stderr)
+
+	rows = []
+	for phase in PHASES:
+		measured = results["phases"][phase]
+		row = [phase, "{:.1f}".format(1000 * measured["seconds"]), "{:.1f}".format(measured["peak_bytes"] / 2**20)]
+		if baseline and phase in baseline["phases"]:
+			expected = baseline["phases"][phase]
+			row.append("{:+.0%}".format(measured["seconds"] / expected["seconds"] - 1) if expected["seconds"] else "-")
+		rows.append(row)
+	print("{modules} modules, depth {depth}, fan-out {fanout}, cycle density {cycle_density}: {nodes} nodes, {edges} edges, {paths} paths".format(
+		**results["tree"], **results["graph"]))
+	print_table(["phase", "ms", "peak MiB"] + (["vs baseline"] if baseline else []), rows)
+
+	if args.output:
+		with open(args.output, 'w') as fd:
+			json.dump(results, fd, indent=2)
+
+	if baseline:
+		regressions = find_regressions(results, baseline, args.threshold)
+		for phase, metric in regressions:
+			print("regression: {phase} {metric} grew by more than {threshold:.0%}".format(phase=phase, metric=metric, threshold=args.threshold), file=sys.stderr)
+		if regressions:
+			sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,85 @@
+import os
+import random
+
+STDLIB_MODULES = ["os", "sys", "re", "json", "collections", "itertools", "functools", "logging"]
+
+## Relative share of each import form
+DEFAULT_IMPORT_MIX = {
+	"plain": 0.55,      # import mJ, or from <package> import mJ across packages
+	"relative": 0.2,    # from <package> import mJ, even within the same package
+	"aliased": 0.15,    # from <package> import mJ as aliasJ
+	"wildcard": 0.1,    # from <package>.mJ import *
+}
+
+## Package of each module: a tuple of package names below the root, filled breadth-first up to depth
+def assign_packages(modules: int, depth: int, branching: int) -> list:
+	packages = [()]
+	frontier = [()]
+	while frontier and len(packages) < max(1, modules // 8):
+		package = frontier.pop(0)
+		if len(package) >= depth:
+			continue
+		for child in range(branching):
+			packages.append(package + ("p{index}".format(index=len(packages)),))
+			frontier.append(packages[-1])
+	return [packages[index % len(packages)] for index in range(modules)]
+
+## Dotted relative module name of package target as seen from a module in package source
+def relative_package(source: tuple, target: tuple) -> str:
+	common = 0
+	while common < min(len(source), len(target)) and source[common] == target[common]:
+		common += 1
+	return "." * (len(source) - common + 1) + ".".join(target[common:])
+
+## Import statement binding module target of package target_package, and the name it binds (None for wildcards)
+def import_statement(form: str, source_package: tuple, target_package: tuple, target: int):
+	module = "m{target}".format(target=target)
+	package = relative_package(source_package, target_package)
+	if form == "plain" and source_package == target_package:
+		return "import {module}".format(module=module), module
+	if form == "aliased":
+		alias = "alias{target}".format(target=target)
+		return "from {package} import {module} as {alias}".format(package=package, module=module, alias=alias), alias
+	if form == "wildcard":
+		separator = "" if package.endswith(".") else "."
+		return "from {package}{separator}{module} import *".format(package=package, separator=separator, module=module), None
+	return "from {package} import {module}".format(package=package, module=module), module
+
+## Write a synthetic tree of modules and packages which import each other, plus an entry file importing all of them
+## Imports normally point at lower-numbered modules; cycle_density is the chance that one points forward instead,
+## which creates import cycles. Returns the path of the entry file
+def generate_tree(root: str, modules=200, fanout=5, lines=100, seed=0, depth=0, branching=4, cycle_density=0.0, import_mix=None) -> str:
+	rng = random.Random(seed)
+	import_mix = import_mix or DEFAULT_IMPORT_MIX
+	forms, weights = list(import_mix), list(import_mix.values())
+	packages = assign_packages(modules, depth, branching)
+
+	for package in set(packages):
+		os.makedirs(os.path.join(root, *package), exist_ok=True)
+		if package:
+			open(os.path.join(root, *package, "__init__.py"), 'w').close()
+
+	for index in range(modules):
+		statements, names = [], []
+		for _ in range(fanout):
+			forward = rng.random() < cycle_density
+			target = rng.randrange(index + 1, modules) if forward and index + 1 < modules else rng.randrange(max(index, 1))
+			if target == index:
+				continue
+			statement, name = import_statement(rng.choices(forms, weights)[0], packages[index], packages[target], target)
+			statements.append(statement)
+			if name:
+				names.append(name)
+		statements.append("import {module}".format(module=rng.choice(STDLIB_MODULES)))
+
+		# Reference roughly half of the bound names so that the rest are reported as unused
+		used = names[:max(1, len(names) // 2)] if names else ["len"]
+		body = ["def f{line}(x):\n    return {name}.f0(x) + {line}".format(line=line, name=rng.choice(used)) for line in range(lines // 2)]
+		with open(os.path.join(root, *packages[index], "m{index}.py".format(index=index)), 'w') as fd:
+			fd.write("\n".join(statements) + "\n\n" + "\n".join(body) + "\n")
+
+	entry = os.path.join(root, "main.py")
+	with open(entry, 'w') as fd:
+		for index in range(modules):
+			fd.write("import {module}\n".format(module=".".join(packages[index] + ("m{index}".format(index=index),))))
+	return entry
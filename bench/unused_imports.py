@@ -0,0 +1,65 @@
+## Compares the cursor-based used-import pass with the original recursive one on a large module
+## Usage (from the repository root): python3 bench/unused_imports.py [lines]
+import os
+import sys
+import tempfile
+from common import timed, print_table
+from parser import Parser
+from extractor import Extractor, File
+
+## Write a module with many imports, only some of which are referenced by its functions
+def generate_module(path: str, lines: int, imports=60):
+	with open(path, 'w') as fd:
+		for index in range(imports):
+			fd.write("import module{index} as alias{index}\n".format(index=index))
+		for line in range(lines // 4):
+			fd.write("def function{line}(value):\n".format(line=line))
+			fd.write("    total = alias{index}.compute(value, [item.field for item in value.items])\n".format(index=line % (imports // 2)))
+			fd.write("    return total + function{previous}(value - 1)\n".format(previous=max(line - 1, 0)))
+			fd.write("\n")
+
+## The original recursive pass, which re-extracted every identifier as a string and merged child sets
+def legacy_used(extractor: Extractor, file: File, tree_sitter_node, aliases: set) -> set:
+	used_imports = set()
+	if tree_sitter_node.type in ["identifier", "attribute"]:
+		token_string = extractor.extract_string(tree_sitter_node, file.source)
+		if token_string in aliases:
+			used_imports.add(token_string)
+	for child in tree_sitter_node.children:
+		used_imports = used_imports.union(legacy_used(extractor, file, child, aliases))
+	return used_imports
+
+def legacy_extract(extractor: Extractor, path: str) -> set:
+	with open(path, 'rb') as fd:
+		source = fd.read()
+	tree = extractor.parser.parse_bytes(source)
+	file = File(path, memoryview(source))
+	aliases, used = set(), set()
+	for node in tree.root_node.children:
+		if extractor.is_import(node):
+			aliases.update(raw_import.alias or raw_import.dotted_name for raw_import in extractor.extract_import(file, node))
+		else:
+			used = used.union(legacy_used(extractor, file, node, aliases))
+	return used
+
+def main():
+	lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	extractor = Extractor(Parser())
+	with tempfile.TemporaryDirectory() as root:
+		path = os.path.join(root, "generated.py")
+		generate_module(path, lines)
+
+		parse_time, _ = timed(extractor.extract_file, path, False)
+		legacy_time, legacy = timed(legacy_extract, extractor, path)
+		cursor_time, file_imports = timed(extractor.extract_file, path, True)
+
+		print("{lines} line module, {used} of {total} imports used, results match: {match}".format(
+			lines=lines, used=len(legacy), total=len(file_imports.imports), match=legacy == file_imports.used))
+		print_table(["pass", "seconds"], [
+			["imports only", "{:.3f}".format(parse_time)],
+			["recursive", "{:.3f}".format(legacy_time)],
+			["cursor", "{:.3f}".format(cursor_time)],
+		])
+
+if __name__ == "__main__":
+	main()
@@ -1,89 +1,105 @@
 import utils
+import libindex
+import resolver
 import logging
 import sys
-import graphviz
+import collections
+import io
+import exporters
+import rendering
 from tree_sitter import Node as TreeSitterNode
 from parser import Parser
-
-## Node represents a file or package that is imported
-class Node():
-    def __init__(self, name: str, ID: str, labels=[], alias=""):
-        self.name = name        # name used by the importing file 
-        self.ID = ID            # filepath or package name which uniquely identifies the file
-        self.labels = labels    # metadata about the node (e.g. 'stdlib' or 'unused') 
-        self.alias = alias      # alias used by importing file
-
-    def __str__(self):
-        name_string = self.name
-        if len(self.name) >= 2 and self.name[0] == "." and self.name[:2] != "..":
-            name_string = self.name[1:]
-        label_string = " ({label})".format(label=", ".join(self.labels)) if self.labels else ""
-        return "{name_string}{label_string}".format(name_string=name_string, label_string=label_string)
-
-    def __hash__(self):
-      return hash((self.name, self.ID, len(self.labels), self.alias))
-
-    def add_label(self, label):
-        print(self.name, self.ID, len(self.labels))
-        self.labels.append(label)
-
-## File contains information about a particular file
-class File():
-    def __init__(self, filepath: str, lines: list):
-        self.filepath = filepath
-        self.lines = lines
+from extractor import Extractor, FileImports
+from cache import ImportCache
+from engine import ParallelEngine
+from paths import PathEngine
+from libindex import LibraryIndex
+from resolver import Resolver
+from graph import DependencyGraph, Node, UNUSED, label_flags
+from stats import Stats, NULL_STATS
+from prefetch import Prefetcher
+from reachability import ReachabilityIndex
 
 ## Config contains configuration information for the dependency analyzer
 class Config():
-    def __init__(self, logging_level=logging.DEBUG, resolve_all_imports=True, render_graph=True, mark_unused=True):
+    def __init__(self, logging_level=logging.DEBUG, resolve_all_imports=True, render_graph=True, mark_unused=True, cache_dir=None, jobs=1, max_depth=None, max_paths=None, output_format="text", output="-", headless=False, stats=None, profile=None, fast_scan=False, prefetch=0, prefetch_window=64, prefetch_memory=64 * 2**20, cluster_depth=None, hide_libraries=False, max_nodes=500, focus=None):
         self.logging_level = logging_level
         self.resolve_all_imports = resolve_all_imports
         self.render_graph = render_graph
         self.mark_unused = mark_unused
+        self.cache_dir = cache_dir      # directory persisting extracted imports between runs, disabled if None
+        self.jobs = jobs                # number of parser processes, the walk is serial if 1
+        self.max_depth = max_depth      # imports after which a printed path is cut short, unlimited if None
+        self.max_paths = max_paths      # number of paths printed per file, unlimited if None
+        self.output_format = output_format  # 'text' to print paths, otherwise a format in exporters.EXPORTERS
+        self.output = output            # file the exported graph is written to, '-' for stdout
+        self.headless = headless        # write the rendered graph as DOT without launching graphviz or a viewer
+        self.stats = stats              # 'table' or 'json' to report timings and counters to stderr, disabled if None
+        self.profile = profile          # 'cprofile' or 'tracemalloc' to include a profile in the statistics
+        self.fast_scan = fast_scan      # only extract imports, including nested ones, when not marking unused imports
+        self.prefetch = prefetch        # threads reading files ahead of a serial walk, disabled if 0
+        self.prefetch_window = prefetch_window  # files read ahead and not yet parsed at most
+        self.prefetch_memory = prefetch_memory  # bytes read ahead after which no more reads are issued
+        self.cluster_depth = cluster_depth  # directory depth at which rendered nodes are collapsed, no collapsing if None
+        self.hide_libraries = hide_libraries  # leave library and unresolved nodes out of the rendered graph
+        self.max_nodes = max_nodes      # nodes rendered at most, the rest folded into one, unlimited if None or 0
+        self.focus = focus or []        # path prefixes whose files are rendered one by one and kept first
 
 ## DependencyAnalyzer class to analyze dependencies for given file and directory 
 class DependencyAnalyzer():
     def __init__(self, config = Config()):
-        self.parser = Parser()                  # tree-sitter Python parser
-        self.libraries = utils.get_libraries()  # list of all available libraries
-        self.graph = {}                         # dependency graph adjacency set
-        self.config = config                    # whether we should process imports that cannot be found
-        self.import_delegate = {                # delegates each identifier to a handler
-            "dotted_name": self.handle_dotted_name,
-            "aliased_import": self.handle_aliased_import,
-            "wildcard_import": self.handle_wildcard_import,
-        }
-        for value in ["import", ",", "(", ")"]:
-            self.import_delegate[value] = lambda x,y,z: None
-
+        # Configure logging before building the library index or cache, since any message they log would
+        # install a default handler and leave the logging level ignored
         logging.basicConfig(level=config.logging_level)
 
-    ## Update package list to add newly installed libraries
+        self.stats = Stats(profile=config.profile) if config.stats else NULL_STATS  # timings and counters of the run
+        with self.stats.phase("grammar"):
+            self.parser = Parser()              # tree-sitter Python parser
+        self.extractor = Extractor(self.parser, self.stats) # extracts raw imports from parse trees
+        with self.stats.phase("libraries"):
+            self.libraries = LibraryIndex(config.cache_dir or utils.get_cache_dir())  # index of all available libraries
+        self.resolver = Resolver(self.libraries)  # resolves imports against cached directory listings
+        self.graph = DependencyGraph()          # dependency graph with reverse index
+        self.visited = set()                    # files already processed or queued
+        self.edge_keys = {}                     # filepath -> keys of its edges, while its imports are being resolved
+        self.frontier = None                    # files awaiting parsing during a parallel walk
+        self.reachability_index = None          # transitive dependency index, built on first query
+        self.config = config                    # whether we should process imports that cannot be found
+        self.fast_scan = config.fast_scan and not config.mark_unused  # whether files are scanned for imports only
+        self.cache = ImportCache(config.cache_dir, self.parser.lib_path, self.fast_scan) if config.cache_dir else None
+        self.prefetcher = None                  # reads files ahead of a serial walk, parallel workers read their own
+        if config.prefetch and config.jobs <= 1:
+            self.prefetcher = Prefetcher(config.prefetch, config.prefetch_window, config.prefetch_memory, stats=self.stats)
+        self.extractor.prefetcher = self.prefetcher
+
+    ## Update package list to add newly installed libraries, which only rescans if the search path changed
     def refresh_packages(self):
-        self.libraries = utils.get_libraries()
+        with self.stats.phase("libraries"):
+            self.libraries = LibraryIndex(self.config.cache_dir or utils.get_cache_dir())
+        self.resolver.libraries = self.libraries
+        self.resolver.invalidate()
 
-    ## Clear the graph and refresh libraries
+    ## Clear the graph and the resolver's snapshot of the filesystem
     def reset(self):
-        self.refresh_packages()
-        self.graph = {}
+        self.resolver.invalidate()
+        self.graph = DependencyGraph()
+        self.visited = set()
+
+    ## Record that the given file imports node
+    def add_edge(self, filepath: str, node: Node) -> int:
+        return self.graph.add_edge(filepath, node.name, node.ID, node.alias, label_flags(node.labels), self.edge_keys.get(filepath))
 
     ## Check if an import is a stdlib module
     def is_stdlib(self, import_name: str) -> bool:
-        lib_name = "{import_name}.py".format(import_name=import_name)
-        return lib_name in self.libraries
+        return self.libraries.kind(import_name) == libindex.STDLIB
 
     ## Check if an import is a site package
     def is_site_package(self, import_name: str) -> bool:
-        package_name = "site_packages.{import_name}.py".format(import_name=import_name)
-        return package_name in self.libraries
+        return self.libraries.kind(import_name) == libindex.SITE_PACKAGE
 
     ## Check if an import is an internal/external library 
     def is_library(self, import_name: str) -> bool:
-        return self.is_stdlib(import_name) or self.is_site_package(import_name)
-
-    ## Check if a tree-sitter node is an import statement
-    def is_import(self, tree_sitter_node: TreeSitterNode) -> bool:
-        return tree_sitter_node.type == "import_statement" or tree_sitter_node.type == "import_from_statement"
+        return self.libraries.kind(import_name) is not None
 
     ## Display the parse tree via DFS
     def print_tree(self, tree_sitter_node: TreeSitterNode, count: int):
@@ -92,254 +108,285 @@ class DependencyAnalyzer():
         for child in tree_sitter_node.children:
             print_tree(child, count+1)
 
-    ## Extract string from file given certain node start and end points
-    def extract_string(self, tree_sitter_node: TreeSitterNode, lines: list) -> str:
-        startline, startidx = tree_sitter_node.start_point
-        endline, endidx = tree_sitter_node.end_point
-        if startline == endline:
-            return lines[startline][startidx:endidx]
-
-        currline = startline + 1
-        substring_list = [lines[startline][startidx:]]
-        while currline < endline:
-            substring_list.append(lines[currline])
-            currline += 1
-        substring_list.append(lines[endline][:endidx])
-        return "".join(substring_list)
-
-    ## Extracts the string corresponding to a dotted name node
-    def extract_dotted_name(self, dotted_name_node: TreeSitterNode, lines: list) -> str:
-        children = dotted_name_node.children
-        identifier_list = []
-        for child in children:
-            if child.type == ".":
-                identifier_list.append(".")
-            else:
-                assert child.start_point[0] == child.end_point[0] ## Assumption: no multi-line identifiers
-                identifier = self.extract_string(child, lines)
-                identifier_list.append(identifier)
-        return "".join(identifier_list)
-
     ## Resolves each import given some optional context representing a parent absolute or relative module 
-    ## Returns the identifier string bound to the import for the file unless the import is a wildcard import or package
-    def handle_dotted_name(self, file: File, dotted_name_node: TreeSitterNode, context_node: TreeSitterNode, alias="") -> Node:
-        dotted_name = self.extract_dotted_name(dotted_name_node, file.lines)
+    ## Returns the node bound to the import for the file unless the import is a package
+    def handle_dotted_name(self, filepath: str, dotted_name: str, context: str, alias="") -> Node:
         if not alias:
             alias = dotted_name
 
-        import_file = utils.get_path(dotted_name)
-        context_dotted_name = dotted_name
-        parent_dir = utils.extract_parent_directory(file.filepath)
-        context_path = parent_dir
-        
-        # Process context iff this call corresponds to an import 'from' statement
-        context = self.extract_dotted_name(context_node, file.lines) if context_node else ""
-        context_dir = utils.get_path(context)
-        context_init_path, context_module_path = "", ""
-        if context_dir:
-            context_path = "{parent_dir}/{context_dir}".format(parent_dir = parent_dir, context_dir=context_dir)
-            context_dotted_name = "{context}.{dotted_name}".format(context=context, dotted_name=dotted_name)
-            context_init_path = "{context_path}/__init__.py".format(context_path = context_path)
-            context_module_path = "{context_path}.py".format(context_path = context_path)
-        
-        # Generate possible paths to search
-        package_path = "{context_path}/{import_file}".format(context_path=context_path, import_file = import_file)
-        module_path = "{package_path}.py".format(package_path = package_path)
-            
+        parent_dir = utils.extract_parent_directory(filepath)
+        with self.stats.phase("resolve"):
+            resolution = self.resolver.resolve(parent_dir, context, dotted_name)
+        self.stats.count("resolution.{branch}".format(branch=resolution.branch))
         node = None
 
-        # Check if import is a Python file within a local module
-        if utils.is_valid_module(module_path):
-            normal_path = utils.get_normal_path(module_path)
-            node = Node(name=context_dotted_name, ID=normal_path, alias=alias)
-            self.graph[file.filepath].add(node)
-            self.process_file(normal_path)
-
-        # Check if import is (possibly) an attribute of a local module
-        elif utils.is_valid_module(context_module_path):
-            normal_path = utils.get_normal_path(context_module_path)
-            node = Node(name=context, ID=normal_path, alias=alias)
-            self.graph[file.filepath].add(node)
-            self.process_file(normal_path)
-
-        # Check if import is a local package
-        elif utils.is_valid_package(package_path):
-            normal_path = utils.get_normal_path(package_path)
-            self.process_dir(file.filepath, context_dotted_name, normal_path)
-
-        # Check if import is (possibly) an attribute of a local module (in the __init__.py file)
-        elif utils.is_valid_module(context_init_path):
-            normal_path = utils.get_normal_path(context_init_path)
-            node = Node(name=context_dotted_name, ID=normal_path, alias=alias)
-            self.graph[file.filepath].add(node)
-            self.process_file(normal_path)
-
-        # Check if import is a library module
-        elif self.is_library(context_dotted_name):
-            label = "stdlib" if self.is_stdlib(context_dotted_name) else "site_package"
-            node = Node(name=context_dotted_name, ID=context_dotted_name, labels=[label], alias=alias)
-            self.graph[context_dotted_name] = set()
-            self.graph[file.filepath].add(node)
-
-        # Check if import is an attribute of a library
-        elif self.is_library(context):
-            label = "stdlib" if self.is_stdlib(context) else "site_package"
-            node = Node(name=context, ID=context, labels=[label], alias=alias)
-            self.graph[context] = set()
-            self.graph[file.filepath].add(node)
+        # Import is a local Python file, or (possibly) an attribute of one
+        if resolution.kind == resolver.MODULE:
+            node = Node(name=resolution.name, ID=resolution.path, alias=alias)
+            self.add_edge(filepath, node)
+            self.enqueue_file(resolution.path)
+
+        # Import is a local package
+        elif resolution.kind == resolver.PACKAGE:
+            self.process_dir(filepath, resolution.name, resolution.path)
+
+        # Import is a library module, or an attribute of one
+        elif resolution.kind == resolver.LIBRARY:
+            node = Node(name=resolution.name, ID=resolution.name, labels=[resolution.label], alias=alias)
+            self.graph.add_node(resolution.name)
+            self.add_edge(filepath, node)
 
         # Handle case where import is neither recognized as a local file nor a known library
         else:
             if self.config.resolve_all_imports:
-                logging.warning("Cannot resolve import {context_dotted_name} in file {filepath}.".format(context_dotted_name=context_dotted_name, filepath=file.filepath))
-                import_name = context if context else dotted_name
-                node = Node(name=import_name, ID=import_name, labels=[], alias=alias)
-                self.graph[import_name] = set()
-                self.graph[file.filepath].add(node)
+                logging.warning("Cannot resolve import {context_dotted_name} in file {filepath}.".format(context_dotted_name=resolution.qualified_name, filepath=filepath))
+                node = Node(name=resolution.name, ID=resolution.name, labels=[], alias=alias)
+                self.graph.add_node(resolution.name)
+                self.add_edge(filepath, node)
 
             else:
-                logging.error("Cannot resolve import {context_dotted_name} in file {filepath}.".format(context_dotted_name=context_dotted_name, filepath=file.filepath))
+                logging.error("Cannot resolve import {context_dotted_name} in file {filepath}.".format(context_dotted_name=resolution.qualified_name, filepath=filepath))
 
         return node
-              
-    ## Extract alias and handle import normally
-    def handle_aliased_import(self, file: File, tree_sitter_node: TreeSitterNode, context: TreeSitterNode) -> Node:
-        dotted_name_node, as_node, alias_node = tree_sitter_node.children
-        alias = self.extract_string(alias_node, file.lines)
-        return self.handle_dotted_name(file, dotted_name_node, context, alias=alias)
-
-    ## Treat a wildcard import like a normal import 
-    def handle_wildcard_import(self, file: File, tree_sitter_node: TreeSitterNode, context: TreeSitterNode) -> Node:
-        self.handle_dotted_name(file, context, None, alias="")
-        return None
-
-    ## Handle each kind of import differently 
-    def delegate_import(self, file: File, import_children: list, context: TreeSitterNode) -> list:
-        import_nodes = []
-        for node in import_children:
-            if node.type in self.import_delegate:
-                import_node = self.import_delegate[node.type](file, node, context)
-                import_nodes.append(import_node)
-            else:
-                logging.error("Unknown node type {nodetype} within import statement".format(nodetype=node.type))
-        return import_nodes
-
-    ## Handle an import statement by differentiating between normal imports and imports 'from'
-    def handle_import(self, file: File, tree_sitter_node: TreeSitterNode) -> list:
-        ## If node is an import statement
-        context = None
-        import_children = tree_sitter_node.children
-
-        # If node is an import from statement, define context and adjust children
-        if tree_sitter_node.type == "import_from_statement":
-            context = import_children[1]
-            import_children = import_children[2:]
-
-        return self.delegate_import(file, import_children, context)
-
-    ## DFS through subtree and check if every identifier is one of the imports, remove from unused map if so
-    def handle_unknown_token(self, file: File, tree_sitter_node: TreeSitterNode, imports: dict):
-        used_imports = set()
-        if tree_sitter_node.type in ["identifier", "attribute"]:
-            token_string = self.extract_string(tree_sitter_node, file.lines)
-            if token_string in imports:
-                used_imports.add(token_string)
 
-        for child in tree_sitter_node.children:
-            used_child_imports = self.handle_unknown_token(file, child, imports)
-            used_imports = used_imports.union(used_child_imports)
-        return used_imports
+    ## Returns the imports extracted from a file, reusing the on-disk cache when the file is unchanged
+    def extract_imports(self, filepath: str) -> FileImports:
+        source = None
+        if self.cache:
+            with self.stats.phase("cache"):
+                file_imports = self.cache.get(filepath, self.config.mark_unused)
+            if file_imports:
+                if self.prefetcher:
+                    self.prefetcher.discard(filepath)
+                return file_imports
+
+            # The stat changed, so compare contents, keeping the bytes to parse them if they changed too
+            source = self.extractor.read_source(filepath)
+            with self.stats.phase("cache"):
+                file_imports = self.cache.get_by_content(filepath, source, self.config.mark_unused)
+            if file_imports:
+                return file_imports
+
+        if self.fast_scan:
+            file_imports = self.extractor.scan_file(filepath, source)
+        else:
+            file_imports = self.extractor.extract_file(filepath, self.config.mark_unused, source)
+        if self.cache:
+            self.cache.put(file_imports)
+        return file_imports
 
     ## Recursively process all files and subdirectories within given directory
     def process_dir(self, src_filepath: str, context_dotted_name: str, dirpath: str):
-        for entry in utils.get_directory_contents(dirpath):
-            entrypath = "{dirpath}/{entryname}".format(dirpath=dirpath, entryname=entry.name)
-            if utils.is_valid_module(entrypath):
-                entryname = utils.extract_filename(entry.name)
-                module_name = "{context_dotted_name}.{entryname}".format(context_dotted_name=context_dotted_name, entryname=entryname)
-                node = Node(name=module_name, ID=entrypath)
-                self.graph[src_filepath].add(node)
-                self.process_file(entrypath)
+        for entrypath in self.resolver.directory_modules(dirpath):
+            entryname = utils.extract_filename(entrypath)
+            module_name = "{context_dotted_name}.{entryname}".format(context_dotted_name=context_dotted_name, entryname=entryname)
+            node = Node(name=module_name, ID=entrypath)
+            self.add_edge(src_filepath, node)
+            self.enqueue_file(entrypath)
+
+    ## Visit a newly discovered file, immediately when walking serially or via the frontier when parsing in parallel
+    def enqueue_file(self, filepath: str):
+        if self.frontier is None:
+            self.process_file(filepath)
+        elif filepath not in self.visited:
+            self.visited.add(filepath)
+            self.graph.add_node(filepath)
+            self.frontier.append(filepath)
 
     ## DFS on a given file to extract dependencies
     def process_file(self, filepath: str):
         # Ensure that we don't revisit files
-        if filepath in self.graph:
+        if filepath in self.visited:
             return
 
         logging.info("[DependencyAnalyzer::process_file] Processing File {file}.".format(file=filepath))
-        
-        # Iterate through the parse tree and process any imports
-        self.graph[filepath] = set()
-        tree, lines = self.parser.parse_file(filepath)
-        file = File(filepath, lines)
-        
+        self.visited.add(filepath)
+        self.graph.add_node(filepath)
+        file_imports = self.extract_imports(filepath)
+        if self.prefetcher:
+            self.prefetch_imports(file_imports)
+        self.resolve_file(file_imports)
+
+    ## Queue reads of the unvisited files a file's imports resolve to, so they load while the walk is busy elsewhere
+    def prefetch_imports(self, file_imports: FileImports):
+        parent_dir = utils.extract_parent_directory(file_imports.filepath)
+        with self.stats.phase("prefetch"):
+            paths = []
+            for raw_import in file_imports.imports:
+                resolution = self.resolver.resolve(parent_dir, raw_import.context, raw_import.dotted_name)
+                if resolution.kind == resolver.MODULE:
+                    paths.append(resolution.path)
+                elif resolution.kind == resolver.PACKAGE:
+                    paths += self.resolver.directory_modules(resolution.path)
+            self.prefetcher.request([path for path in paths if self.needs_read(path)])
+
+    ## Whether a file is still to be visited and must be read, rather than answered by the cache from its stat alone
+    def needs_read(self, filepath: str) -> bool:
+        return filepath not in self.visited and not (self.cache and self.cache.fresh_entry(filepath, self.config.mark_unused))
+
+    ## Resolve a file's imports in source order and mark the ones it never uses
+    def resolve_file(self, file_imports: FileImports):
+        filepath = file_imports.filepath
         imports = {}
-        used_imports = set()
-        for node in tree.root_node.children:
-            if self.is_import(node):
-                import_node_list = self.handle_import(file, node)
-                for import_node in import_node_list:
-                    if import_node:
-                        imports[import_node.alias] = import_node
-            elif self.config.mark_unused:
-                token_used_imports = self.handle_unknown_token(file, node, imports)
-                used_imports = used_imports.union(token_used_imports)
+        # A file's edges are only added here, so duplicates need only be found among the edges of this call
+        self.edge_keys[filepath] = {}
+        try:
+            for raw_import in file_imports.imports:
+                import_node = self.handle_dotted_name(filepath, raw_import.dotted_name, raw_import.context, alias=raw_import.alias)
+                if import_node and not raw_import.wildcard:
+                    imports[import_node.alias] = import_node
+        finally:
+            del self.edge_keys[filepath]
 
         if self.config.mark_unused and utils.extract_filename(filepath) != "__init__":
-            for dependency in self.graph[filepath]:
-                #print("skip", dependency.ID, filepath)
-                alias = dependency.alias
-                if alias and (alias in imports) and (alias not in used_imports) and (dependency.ID == imports[alias].ID):
-                    print(filepath, alias, dependency.ID)
-                    dependency.labels = ["unused"]
-
-
+            with self.stats.phase("mark_unused"):
+                used_imports = file_imports.used
+                for edge in self.graph.edges(filepath):
+                    alias = self.graph.edge_alias_name(edge)
+                    dependency_ID = self.graph.edge_target(edge)
+                    if alias and (alias in imports) and (alias not in used_imports) and (dependency_ID == imports[alias].ID):
+                        self.graph.set_labels(edge, UNUSED)
+
+    ## Breadth-first walk which parses the frontier in a process pool and resolves results as they arrive
+    def process_parallel(self, filepaths: list):
+        self.frontier = collections.deque()
+        for filepath in filepaths:
+            self.enqueue_file(filepath)
+        try:
+            ParallelEngine(self, self.config.jobs).run()
+        finally:
+            self.frontier = None
 
     ## Generates dependency graph for given directory and filepath, returns whether or not call was successful
     def process(self, dirpath: str, filepath: str) -> bool:
         self.reset() # Clear dependency graph 
         
         # Parse directory contents
-        if not utils.directory_contains_file(dirpath, filepath):
+        if not utils.directory_contains_file(dirpath, filepath, self.resolver.directory_files(dirpath)):
             logging.error("File {filepath} is not contained within directory {dirpath}.".format(filepath=filepath, dirpath=dirpath))
             return False
 
-        self.process_file(filepath)
+        with self.stats.phase("process"):
+            if self.config.jobs > 1:
+                self.process_parallel([filepath])
+            else:
+                self.process_file(filepath)
+        self.finish()
         return True
 
-    ## DFS through dependency graph to generate all paths
-    def dependency_paths(self, filepath: str) -> set:
-        # Ensure that filepath is valid
-        dependencies = set()
-        if filepath not in self.graph:
-            return dependencies
-
-        # Initialize root node as filepath
-        name = utils.extract_filename(filepath)
-        root = Node(name=name, ID=filepath)
-        context = [root]
-        visited = set()
-
-        ## DFS through graph and add path to dependencies list each time we encounter a leaf
-        def visit(u: TreeSitterNode):
-            if self.graph[u.ID] and u.ID not in visited:
-                visited.add(u.ID)
-                for v in self.graph[u.ID]:
-                    context.append(v)
-                    visit(v)
-                    context.pop()
+    ## Generates one dependency graph for many entry files, parsing each file they reach once however many
+    ## entries reach it, and returns whether each entry was processed
+    def process_many(self, dirpath: str, filepaths: list) -> dict:
+        self.reset() # Clear dependency graph once for all entries
+
+        directory_files = set(self.resolver.directory_files(dirpath)) # Listed once rather than per entry
+        results = {}
+        for filepath in filepaths:
+            results[filepath] = utils.directory_contains_file(dirpath, filepath, directory_files)
+            if not results[filepath]:
+                logging.error("File {filepath} is not contained within directory {dirpath}.".format(filepath=filepath, dirpath=dirpath))
+
+        with self.stats.phase("process"):
+            entries = [filepath for filepath in filepaths if results[filepath]]
+            if self.config.jobs > 1:
+                self.process_parallel(entries)
             else:
-                dependencies.add(tuple(context))
-            
-        visit(root)
-        return dependencies
+                for filepath in entries:
+                    self.process_file(filepath)
+        self.finish()
+        return results
+
+    ## Generates dependency graph for every Python file within the given directory, parsing each file once
+    def process_directory(self, dirpath: str) -> bool:
+        self.reset() # Clear dependency graph
+
+        with self.stats.phase("process"):
+            filepaths = [utils.get_normal_path(path) for path in self.resolver.directory_files(dirpath) if self.resolver.is_valid_module(path)]
+            if self.config.jobs > 1:
+                self.process_parallel(filepaths)
+            else:
+                if self.prefetcher:
+                    self.prefetcher.request([filepath for filepath in filepaths if self.needs_read(filepath)])
+                for filepath in filepaths:
+                    self.process_file(filepath)
+        self.finish()
+        return True
+
+    ## Freeze the finished graph and persist or report anything gathered along the way
+    def finish(self):
+        with self.stats.phase("finish"):
+            if self.prefetcher:
+                self.prefetcher.clear()
+            self.graph.freeze()
+            if self.cache:
+                self.cache.save()
+        logging.info("[DependencyAnalyzer::finish] {listings} directory listings read, {hits} resolutions reused.".format(listings=self.resolver.stat_calls, hits=self.resolver.memo_hits))
+
+    ## Files which directly import the given file or library
+    def importers(self, ID: str) -> set:
+        return set(self.graph.predecessors(ID))
+
+    ## Files which directly or transitively import the given file or library, i.e. those affected if it changes
+    def affected(self, ID: str) -> set:
+        affected = set()
+        stack = [ID]
+        while stack:
+            for importer in self.graph.predecessors(stack.pop()):
+                if importer not in affected:
+                    affected.add(importer)
+                    stack.append(importer)
+        return affected
+
+    ## Reachability index of the current graph, rebuilt if the graph changed since it was built
+    def reachability(self) -> ReachabilityIndex:
+        index = self.reachability_index
+        if index is None or index.graph is not self.graph or not index.is_current():
+            with self.stats.phase("reachability"):
+                index = self.reachability_index = ReachabilityIndex(self.graph)
+        return index
+
+    ## Whether the first ID of each pair transitively imports the second
+    def depends_on(self, pairs: list) -> list:
+        index = self.reachability()
+        return [index.depends_on(src_ID, dst_ID) for src_ID, dst_ID in pairs]
+
+    ## Every file or library each given ID transitively imports
+    def transitive_dependencies(self, IDs: list) -> dict:
+        index = self.reachability()
+        return {ID: index.dependencies(ID) for ID in IDs}
+
+    ## Every file which transitively imports each given ID
+    def transitive_dependents(self, IDs: list) -> dict:
+        index = self.reachability()
+        return {ID: index.dependents(ID) for ID in IDs}
+
+    ## Lazily generate dependency paths from the given file, collapsing import cycles
+    def dependency_paths(self, filepath: str, max_depth=None, max_count=None):
+        if filepath not in self.graph:
+            return iter(())
+        return PathEngine(self.graph, filepath).iter_paths(max_depth, max_count)
+
+    ## Number of dependency paths from the given file, counted without enumerating them
+    def count_dependency_paths(self, filepath: str) -> int:
+        if filepath not in self.graph:
+            return 0
+        return PathEngine(self.graph, filepath).count_paths()
 
-    ## Generate all dependency paths and pretty print them
+    ## Stream dependency paths and pretty print them, followed by any import cycles
     def print_dependency_paths(self, filepath: str):
-        dependency_paths = self.dependency_paths(filepath)
-        for path in dependency_paths:
+        if filepath not in self.graph:
+            return
+        engine = PathEngine(self.graph, filepath)
+        shown = 0
+        for path in engine.iter_paths(self.config.max_depth, self.config.max_paths):
             print(" "*4 + " <- ".join(map(str, path[::-1])))
+            shown += 1
+
+        total = engine.count_paths()
+        if shown < total:
+            print(" "*4 + "... {shown} of {total} paths shown".format(shown=shown, total=total))
+        for cycle in engine.cycles():
+            print(" "*4 + "cycle: " + " -> ".join(cycle))
 
     ## Print dependency graph
     def print_graph(self):
@@ -348,22 +395,92 @@ class DependencyAnalyzer():
             for adj in self.graph[node]:
                 print(" "*4 + str(adj))
 
-    ## Display dependency graph using graphviz
+    ## Stream the dependency graph to the configured output in the configured format
+    def export_graph(self):
+        exporter, binary = exporters.EXPORTERS[self.config.output_format]
+        if self.config.output == "-":
+            exporter(self.graph, sys.stdout.buffer if binary else sys.stdout)
+            sys.stdout.flush()
+        else:
+            with open(self.config.output, 'wb' if binary else 'w') as stream:
+                exporter(self.graph, stream)
+
+    ## Display the summarized dependency graph using graphviz, or only write it as DOT when headless
+    ## Collapsing, hiding libraries and the node budget keep the layout time bounded on large graphs
     def render_graph(self):
-        dot = graphviz.Digraph(comment='Dependency Graph')
-        for node in self.graph:
-            dot.node(node)
-            edgeset = set()
-            for adj in self.graph[node]:
-                if adj.ID not in edgeset:
-                    dot.edge(node, adj.ID)
-                    edgeset.add(adj.ID)
-        dot.render('dependency_graph', view=True)
+        summary = rendering.summarize(self.graph, self.config.cluster_depth, self.config.hide_libraries, self.config.max_nodes, self.config.focus)
+        self.stats.count("rendered_nodes", len(summary.groups))
+        self.stats.count("rendered_edges", len(summary.edges))
+        stream = io.StringIO()
+        rendering.write_summary_dot(summary, stream)
+        if self.config.headless:
+            with open('dependency_graph.gv', 'w') as fd:
+                fd.write(stream.getvalue())
+            return
+
+        import graphviz # Imported lazily since it is only needed when rendering
+        graphviz.Source(stream.getvalue()).render('dependency_graph', view=True)
 
     ## Produce and display dependency graph for a given file
     def run(self, dirpath: str, filepath: str):
         success = self.process(dirpath, filepath)
-        self.print_dependency_paths(filepath)
+        with self.stats.phase("output"):
+            if self.config.output_format == "text":
+                self.print_dependency_paths(filepath)
+            else:
+                self.export_graph()
         if success and self.config.render_graph:
-            self.render_graph()
-
+            with self.stats.phase("render"):
+                self.render_graph()
+        self.print_cache_stats()
+        self.print_stats()
+
+    ## Produce and display dependency paths for each of many entry files, analyzed against one shared graph
+    def run_many(self, dirpath: str, filepaths: list):
+        results = self.process_many(dirpath, filepaths)
+        with self.stats.phase("output"):
+            if self.config.output_format == "text":
+                for filepath in filepaths:
+                    if results[filepath]:
+                        print(filepath)
+                        self.print_dependency_paths(filepath)
+            else:
+                self.export_graph()
+        if any(results.values()) and self.config.render_graph:
+            with self.stats.phase("render"):
+                self.render_graph()
+        self.print_cache_stats()
+        self.print_stats()
+        return results
+
+    ## Produce and display the dependency graph for every file in a directory
+    def run_directory(self, dirpath: str):
+        success = self.process_directory(dirpath)
+        with self.stats.phase("output"):
+            if self.config.output_format == "text":
+                self.print_graph()
+            else:
+                self.export_graph()
+        if success and self.config.render_graph:
+            with self.stats.phase("render"):
+                self.render_graph()
+        self.print_cache_stats()
+        self.print_stats()
+
+    ## Print import cache hit and miss counts, if caching is enabled
+    def print_cache_stats(self):
+        if self.cache:
+            print("Import cache: {hits} hits, {misses} misses".format(hits=self.cache.hits, misses=self.cache.misses), file=sys.stderr)
+
+    ## Report timings and counters of the run to stderr, if statistics are enabled
+    def print_stats(self):
+        if not self.stats.enabled:
+            return
+        self.stats.counters["directory_listings"] = self.resolver.stat_calls
+        self.stats.counters["resolutions_reused"] = self.resolver.memo_hits
+        if self.cache:
+            self.stats.counters["cache_hits"] = self.cache.hits
+            self.stats.counters["cache_misses"] = self.cache.misses
+        self.stats.counters["graph_nodes"] = len(self.graph)
+        self.stats.counters["graph_edges"] = self.graph.edge_count()
+        self.stats.report(self.config.stats)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+from extractor import FileImports
+
+CACHE_VERSION = 1                   # bump whenever the extracted data or its format changes
+CACHE_FILENAME = "imports.json"
+FAST_SCAN_CACHE_FILENAME = "imports-fast.json"   # fast scans also find nested imports, so are cached apart
+
+## ImportCache persists each file's extracted imports across runs
+## Entries are keyed by path and validated by (mtime, size), falling back to a content hash when the stat changed,
+## computed from the bytes read for parsing so that a changed file is read only once
+class ImportCache():
+	def __init__(self, cache_dir: str, grammar_path: str, fast_scan=False):
+		self.cache_dir = cache_dir
+		self.cache_path = os.path.join(cache_dir, FAST_SCAN_CACHE_FILENAME if fast_scan else CACHE_FILENAME)
+		self.stamp = self.version_stamp(grammar_path)
+		self.entries = {}       # absolute filepath -> serialized FileImports plus stat key
+		self.dirty = False      # whether entries changed since the last save
+		self.hits = 0
+		self.misses = 0
+		self.load()
+
+	## Version stamp covering the cache format and the grammar that produced the parse trees
+	def version_stamp(self, grammar_path: str) -> str:
+		try:
+			stat = os.stat(grammar_path)
+			grammar = "{mtime}:{size}".format(mtime=stat.st_mtime_ns, size=stat.st_size)
+		except OSError:
+			grammar = "missing"
+		return "{version}/{grammar}".format(version=CACHE_VERSION, grammar=grammar)
+
+	## Load entries from disk, dropping them if they were written by a different version
+	def load(self):
+		try:
+			with open(self.cache_path, 'r') as fd:
+				contents = json.load(fd)
+		except (OSError, ValueError):
+			return
+
+		if contents.get("version") != self.stamp:
+			logging.info("[ImportCache::load] Discarding stale cache {path}.".format(path=self.cache_path))
+			self.dirty = True
+			return
+		self.entries = contents.get("entries", {})
+
+	## Write entries back to disk if anything changed
+	def save(self):
+		if not self.dirty:
+			return
+		os.makedirs(self.cache_dir, exist_ok=True)
+		temp_path = "{path}.tmp".format(path=self.cache_path)
+		with open(temp_path, 'w') as fd:
+			json.dump({"version": self.stamp, "entries": self.entries}, fd)
+		os.replace(temp_path, self.cache_path)
+		self.dirty = False
+
+	## Stat key used to validate an entry without reading the file
+	def stat_key(self, filepath: str) -> list:
+		stat = os.stat(filepath)
+		return [stat.st_mtime_ns, stat.st_size]
+
+	## Cached entry for a file whose stat is unchanged, found without reading the file, or None
+	def fresh_entry(self, filepath: str, mark_unused: bool) -> dict:
+		entry = self.entries.get(os.path.abspath(filepath))
+		if entry is None or (mark_unused and entry["used"] is None):
+			return None
+		try:
+			return entry if entry["stat"] == self.stat_key(filepath) else None
+		except OSError:
+			return None
+
+	## Return the cached imports for a file whose stat is unchanged, or None if its contents must be read
+	def get(self, filepath: str, mark_unused: bool) -> FileImports:
+		entry = self.fresh_entry(filepath, mark_unused)
+		if entry is None:
+			return None
+		self.hits += 1
+		return FileImports.from_dict(filepath, entry)
+
+	## Content hash recorded for a file, or None if it has no entry usable for the run
+	def cached_digest(self, filepath: str, mark_unused: bool) -> str:
+		entry = self.entries.get(os.path.abspath(filepath))
+		if entry is None or (mark_unused and entry["used"] is None):
+			return None
+		return entry["digest"]
+
+	## Return the cached imports for a file whose stat changed but whose contents hash the same, updating its stat
+	def refresh(self, filepath: str) -> FileImports:
+		entry = self.entries[os.path.abspath(filepath)]
+		entry["stat"] = self.stat_key(filepath)
+		self.dirty = True
+		self.hits += 1
+		return FileImports.from_dict(filepath, entry)
+
+	## Return the cached imports for a file whose stat changed but whose contents, read by the caller to be
+	## parsed if need be, hash the same, or None if the file must be parsed again
+	def get_by_content(self, filepath: str, source: bytes, mark_unused: bool) -> FileImports:
+		digest = self.cached_digest(filepath, mark_unused)
+		if digest is None or digest != hashlib.sha1(source).hexdigest():
+			return None
+		return self.refresh(filepath)
+
+	## Store freshly extracted imports for a file, which the cache missed
+	def put(self, file_imports: FileImports):
+		self.misses += 1
+		entry = file_imports.to_dict()
+		entry["stat"] = self.stat_key(file_imports.filepath)
+		self.entries[os.path.abspath(file_imports.filepath)] = entry
+		self.dirty = True
@@ -1,6 +1,10 @@
 import sys
+import json
+import subprocess
 import utils
 import argparse
+import exporters
+import stats
 from analyzer import DependencyAnalyzer, Config
 
 
@@ -10,9 +14,11 @@ def parse_args():
 	parser = argparse.ArgumentParser(description="Analyze dependencies for input Python file.")
 	parser.add_argument("dirpath", type=str,
 	                    help="directory path to analyze")
-	parser.add_argument("filepath", type=str,
-	                    help="python file path to analyze")
+	parser.add_argument("filepath", type=str, nargs="?", default=None,
+	                    help="python file path to analyze, every file in the directory is analyzed if omitted")
 
+	parser.add_argument("--file_list", type=str, default=None,
+	                    help="file listing entry files to analyze against one shared graph, one per line, or - for stdin")
 	parser.add_argument("-l", "--logging_level", type=str, default="error",
 						choices=set(logging_levels),
 	                    help="logging level")
@@ -22,23 +28,152 @@ def parse_args():
 	                    help="flag to render dependency graph")
 	parser.add_argument("-u", "--mark_unused", action='store_true',
 	                    help="flag to mark unused dependencies")
+	parser.add_argument("-c", "--cache_dir", type=str, default=None,
+	                    help="directory in which to cache extracted imports between runs")
+	parser.add_argument("-j", "--jobs", type=int, default=1,
+	                    help="number of processes used to parse files")
+	parser.add_argument("--max_depth", type=int, default=None,
+	                    help="maximum number of imports printed per dependency path")
+	parser.add_argument("--max_paths", type=int, default=None,
+	                    help="maximum number of dependency paths printed")
+	parser.add_argument("-f", "--output_format", type=str, default="text",
+	                    choices=["text"] + sorted(exporters.EXPORTERS),
+	                    help="print dependency paths as text, or stream the whole graph in a machine-readable format")
+	parser.add_argument("-o", "--output", type=str, default="-",
+	                    help="file to write the exported graph to, stdout by default")
+	parser.add_argument("--headless", action='store_true',
+	                    help="with -g, write the graph to dependency_graph.gv instead of rendering and opening it")
+	parser.add_argument("-d", "--daemon", type=str, default=None,
+	                    help="keep the analysis of the whole directory in memory and answer queries on the given Unix socket")
+	parser.add_argument("--poll_interval", type=float, default=0.5,
+	                    help="seconds between checks for changed files in daemon mode")
+	parser.add_argument("-i", "--importers", type=str, default=None,
+	                    help="print the files which directly import the given file or library")
+	parser.add_argument("-a", "--affected", type=str, default=None,
+	                    help="print the files which directly or transitively import the given file or library")
+	parser.add_argument("-q", "--queries", action='store_true',
+	                    help="after the analysis, answer reachability queries read from stdin, one per line: "
+	                         "'depends_on <file> <dependency>', 'dependencies <file>' or 'dependents <file>'")
+	parser.add_argument("--stats", type=str, nargs="?", const="table", default=None, choices=["table", "json"],
+	                    help="report time per phase, counters and the slowest files to stderr, as a table by default")
+	parser.add_argument("--fast_scan", action='store_true',
+	                    help="only extract imports, skipping files without any and including imports nested in module level blocks (ignored with -u)")
+	parser.add_argument("--prefetch", type=int, default=0,
+	                    help="number of threads reading files ahead of parsing, which helps on slow or network filesystems")
+	parser.add_argument("--prefetch_memory", type=int, default=64,
+	                    help="megabytes of files read ahead at most")
+	parser.add_argument("--profile", type=str, default=None, choices=stats.PROFILERS,
+	                    help="profile the run and include the top entries in the statistics, implies --stats")
+	parser.add_argument("--cluster_depth", type=int, default=None,
+	                    help="with -g, collapse files into their directory at this depth, and libraries into their package")
+	parser.add_argument("--hide_libraries", action='store_true',
+	                    help="with -g, leave libraries and unresolved imports out of the rendered graph")
+	parser.add_argument("--max_nodes", type=int, default=500,
+	                    help="with -g, render at most this many nodes and fold the rest into one, 0 for no limit")
+	parser.add_argument("--focus", type=str, action='append', default=None,
+	                    help="with -g, render files under this path prefix one by one and keep them under the node budget, repeatable")
+	parser.add_argument("-r", "--revision", type=str, action='append', default=None,
+	                    help="analyze a git revision read from the repository's object store instead of the working tree, "
+	                         "with paths relative to the repository root, repeatable to analyze several revisions in turn")
+	parser.add_argument("--repo", type=str, default=".",
+	                    help="git repository whose revisions are analyzed, the current directory by default")
 	
 
 
 	args = parser.parse_args()
 	render_graph = args.render_graph
 
-	if not utils.is_valid_dir(args.dirpath):
+	if args.revision and not utils.is_valid_dir(args.repo):
+		print("\n[Command Line Error] Invalid repository \"{repo}\".".format(repo=args.repo), file=sys.stderr)
+
+	elif not args.revision and not utils.is_valid_dir(args.dirpath):
 		print("\n[Command Line Error] Invalid directory \"{dirpath}\".".format(dirpath=args.dirpath), file=sys.stderr)
 
 	
-	elif not utils.is_valid_file(args.filepath):
+	elif not args.revision and args.filepath is not None and not utils.is_valid_file(args.filepath):
 		print("\n[Command Line Error] Invalid file \"{filepath}\".".format(filepath=args.filepath), file=sys.stderr)
 
 	else:
 		logging_level = logging_levels.index(args.logging_level)*10
-		config = Config(logging_level=logging_level, resolve_all_imports=not args.search_imports, render_graph=args.render_graph, mark_unused = args.mark_unused)
+		config = Config(logging_level=logging_level, resolve_all_imports=not args.search_imports, render_graph=args.render_graph, mark_unused = args.mark_unused, cache_dir=args.cache_dir, jobs=args.jobs, max_depth=args.max_depth, max_paths=args.max_paths, output_format=args.output_format, output=args.output, headless=args.headless, stats=args.stats or (args.profile and "table"), profile=args.profile, fast_scan=args.fast_scan, prefetch=args.prefetch, prefetch_memory=args.prefetch_memory * 2**20, cluster_depth=args.cluster_depth, hide_libraries=args.hide_libraries, max_nodes=args.max_nodes, focus=args.focus)
 		dependency_analyzer = DependencyAnalyzer(config)
+		if args.daemon:
+			from daemon import AnalyzerDaemon # Imported lazily since it is only needed in daemon mode
+			try:
+				AnalyzerDaemon(dependency_analyzer, args.dirpath, args.daemon, args.poll_interval).serve()
+			except KeyboardInterrupt:
+				pass
+			return
+
+		file_list = read_file_list(args.file_list) if args.file_list else None
+		if args.revision:
+			run_revisions(dependency_analyzer, args, file_list)
+		else:
+			run_analysis(dependency_analyzer, args, file_list)
+
+		if args.importers:
+			print_lookup("Importers", args.importers, dependency_analyzer.importers(lookup_id(args.importers)))
+		if args.affected:
+			print_lookup("Affected", args.affected, dependency_analyzer.affected(lookup_id(args.affected)))
+		if args.queries:
+			answer_queries(dependency_analyzer, sys.stdin)
+
+## Analyze the entry file, the entry files of a file list or the whole directory
+def run_analysis(dependency_analyzer, args, file_list):
+	if file_list is not None:
+		dependency_analyzer.run_many(args.dirpath, file_list)
+	elif args.filepath is None:
+		dependency_analyzer.run_directory(args.dirpath)
+	else:
 		dependency_analyzer.run(args.dirpath, args.filepath)
 
+## Analyze each requested revision in turn, reusing the imports of files unchanged between them
+def run_revisions(dependency_analyzer, args, file_list):
+	from revision import RevisionAnalysis # Imported lazily since it is only needed for revisions
+	revisions = RevisionAnalysis(dependency_analyzer, args.repo)
+	try:
+		for revision in args.revision:
+			try:
+				commit = revisions.checkout(revision)
+			except (subprocess.CalledProcessError, ValueError):
+				print("\n[Command Line Error] Invalid revision \"{revision}\".".format(revision=revision), file=sys.stderr)
+				return
+			print("Revision {revision} ({commit}):".format(revision=revision, commit=commit))
+			run_analysis(dependency_analyzer, args, file_list)
+	finally:
+		revisions.close()
+
+## Entry files listed one per line in a file or on stdin, skipping blank lines
+def read_file_list(path):
+	if path == "-":
+		return [line.strip() for line in sys.stdin if line.strip()]
+	with open(path, 'r') as fd:
+		return [line.strip() for line in fd if line.strip()]
+
+## Graph nodes for files are normalized paths, while libraries are identified by name
+def lookup_id(name):
+	return utils.get_normal_path(name) if utils.is_valid_file(name) else name
+
+## Print the result of a reverse dependency lookup
+def print_lookup(title, name, filepaths):
+	print("{title} of {name}:".format(title=title, name=name))
+	for filepath in sorted(filepaths):
+		print(" "*4 + filepath)
 
+## Answer reachability queries line by line, printing one JSON object per query
+def answer_queries(dependency_analyzer, stream):
+	commands = {
+		"depends_on": (2, lambda IDs: dependency_analyzer.depends_on([IDs])[0]),
+		"dependencies": (1, lambda IDs: sorted(dependency_analyzer.transitive_dependencies(IDs)[IDs[0]])),
+		"dependents": (1, lambda IDs: sorted(dependency_analyzer.transitive_dependents(IDs)[IDs[0]])),
+	}
+	for line in stream:
+		words = line.split()
+		if not words:
+			continue
+		command, arity = words[0], commands.get(words[0], (None,))[0]
+		if arity is None or len(words) != arity + 1:
+			print(json.dumps({"query": line.strip(), "error": "Expected one of: depends_on <file> <dependency>, dependencies <file>, dependents <file>."}))
+		else:
+			print(json.dumps({"query": line.strip(), "result": commands[command][1]([lookup_id(word) for word in words[1:]])}))
+		sys.stdout.flush()
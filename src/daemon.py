@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import socket
+import logging
+import selectors
+import utils
+from extractor import Extractor, FileImports
+
+RECEIVE_SIZE = 65536    # bytes read from a client at once
+
+## Length of the longest common prefix of two byte strings, found by comparing slices
+def common_prefix_length(a: bytes, b: bytes) -> int:
+	low, high = 0, min(len(a), len(b))
+	while low < high:
+		mid = (low + high + 1) // 2
+		if a[:mid] == b[:mid]:
+			low = mid
+		else:
+			high = mid - 1
+	return low
+
+## Length of the longest common suffix of two byte strings which does not overlap the first skip bytes
+def common_suffix_length(a: bytes, b: bytes, skip: int) -> int:
+	low, high = 0, min(len(a), len(b)) - skip
+	while low < high:
+		mid = (low + high + 1) // 2
+		if a[len(a) - mid:] == b[len(b) - mid:]:
+			low = mid
+		else:
+			high = mid - 1
+	return low
+
+## Tree-sitter (row, column) point of a byte offset
+def byte_point(source: bytes, offset: int) -> tuple:
+	row = source.count(b"\n", 0, offset)
+	return (row, offset - (source.rfind(b"\n", 0, offset) + 1))
+
+## FileState is everything kept in memory about a parsed file
+class FileState():
+	def __init__(self, stat_key: tuple, source: bytes, tree, file_imports: FileImports):
+		self.stat_key = stat_key
+		self.source = source
+		self.tree = tree
+		self.file_imports = file_imports
+
+## IncrementalExtractor keeps every parse tree and reparses changed files incrementally from their old tree
+class IncrementalExtractor(Extractor):
+	def __init__(self, parser, stats):
+		super().__init__(parser, stats)
+		self.states = {}        # filepath -> FileState
+		self.reparsed = 0       # files reparsed incrementally
+
+	## Return the stored imports for an unchanged file, or parse it again reusing its previous tree
+	def extract_file(self, filepath: str, mark_unused: bool, source=None) -> FileImports:
+		stat = os.stat(filepath)
+		stat_key = (stat.st_mtime_ns, stat.st_size)
+		state = self.states.get(filepath)
+		if state and state.stat_key == stat_key and (state.file_imports.used is not None or not mark_unused):
+			return state.file_imports
+
+		if source is None:
+			source = self.read_source(filepath)
+		old_tree = self.edit_tree(state, source) if state else None
+		with self.stats.phase("parse"):
+			tree = self.parser.parse_bytes(source, old_tree)
+		with self.stats.phase("extract"):
+			file_imports = self.extract_tree(filepath, source, tree, mark_unused)
+		self.states[filepath] = FileState(stat_key, source, tree, file_imports)
+		return file_imports
+
+	## Apply the single edit which turns the old source into the new one to the old tree
+	def edit_tree(self, state: FileState, source: bytes):
+		old_source = state.source
+		start = common_prefix_length(old_source, source)
+		suffix = common_suffix_length(old_source, source, start)
+		old_end, new_end = len(old_source) - suffix, len(source) - suffix
+		state.tree.edit(
+			start_byte=start,
+			old_end_byte=old_end,
+			new_end_byte=new_end,
+			start_point=byte_point(source, start),
+			old_end_point=byte_point(old_source, old_end),
+			new_end_point=byte_point(source, new_end),
+		)
+		self.reparsed += 1
+		return state.tree
+
+	## Drop everything kept for a file
+	def forget(self, filepath: str):
+		self.states.pop(filepath, None)
+
+## ClientConnection is a connected client with the partial request line received from it and the replies not yet sent
+class ClientConnection():
+	def __init__(self, connection: socket.socket):
+		self.connection = connection
+		self.received = b""     # bytes received after the last complete request line
+		self.replies = b""      # reply bytes the socket has not taken yet
+		self.finished = False   # whether the client shut down its side, so that it is closed once answered
+
+	## Selector events awaited: requests until the client finishes, and room to send while replies are pending
+	def events(self) -> int:
+		return (0 if self.finished else selectors.EVENT_READ) | (selectors.EVENT_WRITE if self.replies else 0)
+
+## AnalyzerDaemon keeps a whole-directory analysis in memory, polls the directory for changes
+## and answers queries over a Unix socket, one JSON request per line
+class AnalyzerDaemon():
+	def __init__(self, analyzer, dirpath: str, socket_path: str, poll_interval=0.5):
+		self.analyzer = analyzer
+		self.dirpath = dirpath
+		self.socket_path = socket_path
+		self.poll_interval = poll_interval
+		self.snapshot = {}      # filepath -> (mtime, size) as of the last poll
+		self.next_poll = 0      # monotonic time at which the directory is next polled
+		self.commands = {       # delegates each request to a handler
+			"dependencies": self.handle_dependencies,
+			"importers": self.handle_importers,
+			"affected": self.handle_affected,
+			"count_paths": self.handle_count_paths,
+			"status": self.handle_status,
+		}
+		analyzer.extractor = IncrementalExtractor(analyzer.parser, analyzer.stats)
+		analyzer.extractor.prefetcher = analyzer.prefetcher
+
+	## Stat every Python file within the directory, listed afresh through the resolver's snapshots
+	def scan(self) -> dict:
+		snapshot = {}
+		self.analyzer.resolver.invalidate()
+		for path in self.analyzer.resolver.directory_files(self.dirpath):
+			if path[-3:] == ".py":
+				try:
+					stat = os.stat(path)
+				except OSError:
+					continue
+				snapshot[utils.get_normal_path(path)] = (stat.st_mtime_ns, stat.st_size)
+		return snapshot
+
+	## Build the initial graph, leaving it mutable for later updates
+	def build(self):
+		self.snapshot = self.scan()
+		self.analyzer.process_directory(self.dirpath)
+		self.analyzer.graph.thaw()
+
+	## Bring the graph up to date with the files changed since the last poll
+	## A file changing again while it is read leaves the previous snapshot in place, so the next poll retries
+	def poll(self):
+		self.next_poll = time.monotonic() + self.poll_interval
+		previous = self.snapshot
+		try:
+			snapshot = self.scan()
+			if snapshot == previous:
+				return
+			start = time.perf_counter()
+			created = snapshot.keys() - previous.keys()
+			deleted = previous.keys() - snapshot.keys()
+			modified = [path for path in snapshot.keys() & previous.keys() if snapshot[path] != previous[path]]
+			self.snapshot = snapshot
+
+			if created or deleted:
+				# Files appearing or disappearing can change how any import resolves, so resolve everything
+				# again; unchanged files are answered from memory and only modified ones are reparsed
+				for path in deleted:
+					self.analyzer.extractor.forget(path)
+				self.build()
+			else:
+				for path in modified:
+					self.update_file(path)
+				self.compact()
+		except OSError as error:
+			logging.warning("[AnalyzerDaemon::poll] Retrying on the next poll: {error}".format(error=error))
+			self.snapshot = previous
+			return
+		logging.info("[AnalyzerDaemon::poll] Updated {count} files in {elapsed:.1f} ms.".format(
+			count=len(created) + len(deleted) + len(modified), elapsed=1000 * (time.perf_counter() - start)))
+
+	## Reparse a modified file and replace its edges
+	def update_file(self, filepath: str):
+		analyzer = self.analyzer
+		analyzer.graph.remove_edges(filepath)
+		if filepath in analyzer.visited:
+			analyzer.resolve_file(analyzer.extract_imports(filepath))
+
+	## Drop removed edges from the edge columns once they outnumber the live ones, so repeated saves do not grow them
+	def compact(self):
+		graph = self.analyzer.graph
+		if graph.removed > len(graph.edge_src) // 2:
+			graph.freeze()
+			graph.thaw()
+
+	def handle_dependencies(self, request: dict):
+		return [{"name": node.name, "ID": node.ID, "labels": node.labels, "alias": node.alias} for node in self.analyzer.graph[request["path"]]]
+
+	def handle_importers(self, request: dict):
+		return sorted(self.analyzer.importers(request["path"]))
+
+	def handle_affected(self, request: dict):
+		return sorted(self.analyzer.affected(request["path"]))
+
+	def handle_count_paths(self, request: dict):
+		return self.analyzer.count_dependency_paths(request["path"])
+
+	def handle_status(self, request: dict):
+		graph = self.analyzer.graph
+		return {"files": len(self.snapshot), "nodes": len(graph), "edges": graph.edge_count(), "reparsed": self.analyzer.extractor.reparsed}
+
+	## Answer a single request line from the graph as of the last poll
+	def handle_request(self, line: bytes) -> dict:
+		try:
+			request = json.loads(line.decode('utf8'))
+			if "path" in request and utils.is_valid_file(request["path"]):
+				request["path"] = utils.get_normal_path(request["path"])
+			handler = self.commands.get(request.get("command"))
+			if handler is None:
+				return {"ok": False, "error": "Unknown command {command}.".format(command=request.get("command"))}
+			return {"ok": True, "result": handler(request)}
+		except (ValueError, KeyError, AttributeError) as error:
+			return {"ok": False, "error": "Invalid request: {error}.".format(error=error)}
+
+	## Accept a client, whose requests are then read as they arrive alongside every other client's
+	def accept_client(self, server: socket.socket, selector):
+		try:
+			connection, _ = server.accept()
+		except BlockingIOError:
+			return # Another wakeup already accepted it
+		connection.setblocking(False)
+		selector.register(connection, selectors.EVENT_READ, ClientConnection(connection))
+
+	## Answer every complete request line received from a client and send as much of the replies as the socket takes,
+	## closing the client once it has finished and been answered or once it went away
+	def serve_client(self, client: ClientConnection, events: int, selector):
+		try:
+			if events & selectors.EVENT_READ:
+				data = client.connection.recv(RECEIVE_SIZE)
+				if not data:
+					client.finished = True
+					data = b"\n" # The last request line may lack its newline
+				*lines, client.received = (client.received + data).split(b"\n")
+				for line in lines:
+					if line.strip():
+						client.replies += json.dumps(self.handle_request(line)).encode('utf8') + b"\n"
+			if client.replies:
+				client.replies = client.replies[client.connection.send(client.replies):]
+		except BlockingIOError:
+			pass
+		except OSError:
+			client.finished, client.replies = True, b"" # Client went away
+		events = client.events()
+		if events:
+			selector.modify(client.connection, events, client)
+		else:
+			selector.unregister(client.connection)
+			client.connection.close()
+
+	## Build the graph, then serve clients as their requests arrive, polling for changes every poll interval
+	def serve(self):
+		self.build()
+		if os.path.exists(self.socket_path):
+			os.unlink(self.socket_path)
+		server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		server.bind(self.socket_path)
+		server.listen()
+		server.setblocking(False)
+		selector = selectors.DefaultSelector()
+		selector.register(server, selectors.EVENT_READ)
+		logging.info("[AnalyzerDaemon::serve] Listening on {path}.".format(path=self.socket_path))
+		try:
+			self.next_poll = time.monotonic() + self.poll_interval
+			while True:
+				for key, events in selector.select(max(0, self.next_poll - time.monotonic())):
+					if key.fileobj is server:
+						self.accept_client(server, selector)
+					else:
+						self.serve_client(key.data, events, selector)
+				if time.monotonic() >= self.next_poll:
+					self.poll()
+		finally:
+			for key in list(selector.get_map().values()):
+				key.fileobj.close()
+			selector.close()
+			os.unlink(self.socket_path)
+
+## Send one request to a running daemon and return its reply
+def query(socket_path: str, request: dict) -> dict:
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+		client.connect(socket_path)
+		with client.makefile('rwb') as stream:
+			stream.write(json.dumps(request).encode('utf8') + b"\n")
+			stream.flush()
+			client.shutdown(socket.SHUT_WR)
+			return json.loads(stream.readline().decode('utf8'))
@@ -0,0 +1,66 @@
+import hashlib
+import concurrent.futures
+from parser import Parser
+from extractor import Extractor, FileImports
+
+worker_extractor = None     # extractor owned by the current worker process
+
+## Parse a single file inside a worker process, or return None without parsing it if its contents hash to
+## the digest cached for it, which happens whenever a checkout gave an unchanged file a new stat
+## The parser is built on the worker's first call, since tree-sitter parsers cannot be pickled and
+## Python 3.6 process pools take no initializer
+def extract_worker(lib_path: str, tree_sitter_python_path: str, filepath: str, mark_unused: bool, fast_scan: bool, digest=None) -> FileImports:
+	global worker_extractor
+	if worker_extractor is None:
+		worker_extractor = Extractor(Parser(lib_path, tree_sitter_python_path))
+	source = worker_extractor.read_source(filepath)
+	if digest is not None and hashlib.sha1(source).hexdigest() == digest:
+		return None
+	if fast_scan:
+		return worker_extractor.scan_file(filepath, source)
+	return worker_extractor.extract_file(filepath, mark_unused, source)
+
+## ParallelEngine drains an analyzer's frontier, parsing files in a process pool while the
+## main process resolves the returned imports and schedules any newly discovered files
+class ParallelEngine():
+	def __init__(self, analyzer, jobs: int):
+		self.analyzer = analyzer
+		self.jobs = jobs
+		self.window = 2 * jobs      # maximum number of files handed to the pool at once
+
+	## Submit frontier files until the window is full, resolving files whose stat the cache still matches directly
+	## and handing workers the cached digest of the others, so that they only parse files whose contents changed
+	def fill(self, pool, in_flight: dict):
+		analyzer = self.analyzer
+		mark_unused = analyzer.config.mark_unused
+		while analyzer.frontier and len(in_flight) < self.window:
+			filepath = analyzer.frontier.popleft()
+			file_imports = analyzer.cache.get(filepath, mark_unused) if analyzer.cache else None
+			if file_imports:
+				analyzer.resolve_file(file_imports)
+			else:
+				digest = analyzer.cache.cached_digest(filepath, mark_unused) if analyzer.cache else None
+				future = pool.submit(extract_worker, analyzer.parser.lib_path, analyzer.parser.tree_sitter_python_path,
+					filepath, mark_unused, analyzer.fast_scan, digest)
+				in_flight[future] = filepath
+
+	## Run until the frontier is exhausted and every submitted file has been resolved
+	def run(self):
+		analyzer = self.analyzer
+		with concurrent.futures.ProcessPoolExecutor(self.jobs) as pool:
+			in_flight = {}
+			self.fill(pool, in_flight)
+			while in_flight:
+				with analyzer.stats.phase("wait_workers"):
+					done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+				for future in done:
+					filepath = in_flight.pop(future)
+					file_imports = future.result()
+					if file_imports is None:
+						file_imports = analyzer.cache.refresh(filepath)
+					else:
+						analyzer.stats.count("files_parsed_by_workers")
+						if analyzer.cache:
+							analyzer.cache.put(file_imports)
+					analyzer.resolve_file(file_imports)
+				self.fill(pool, in_flight)
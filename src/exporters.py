@@ -0,0 +1,86 @@
+import json
+import struct
+from graph import DependencyGraph, REMOVED, label_names
+
+## Binary edge list layout, all integers little endian:
+##   magic b"DAEL", format version (u32), node count (u32), then per node its utf8 ID length (u32) and bytes,
+##   then edge count (u32) and per edge source node (u32), target node (u32) and label flags (u8)
+BINARY_MAGIC = b"DAEL"
+BINARY_VERSION = 1
+
+## Live edges of the graph as (source index, edge index) pairs, in node order
+def iter_edges(graph: DependencyGraph):
+	for src in range(len(graph.nodes)):
+		for edge in graph.node_edges(src):
+			if not graph.edge_labels[edge] & REMOVED:
+				yield src, edge
+
+## Quote an ID for the DOT language
+def dot_id(ID: str) -> str:
+	return '"{ID}"'.format(ID=ID.replace("\\", "\\\\").replace('"', '\\"'))
+
+## One JSON object per line: every node, then every edge
+def write_jsonl(graph: DependencyGraph, stream):
+	for ID in graph:
+		stream.write(json.dumps({"type": "node", "id": ID}) + "\n")
+	for src, edge in iter_edges(graph):
+		stream.write(json.dumps({
+			"type": "edge",
+			"source": graph.nodes[src],
+			"target": graph.edge_target(edge),
+			"name": graph.names[graph.edge_name[edge]],
+			"alias": graph.edge_alias_name(edge),
+			"labels": label_names(graph.edge_labels[edge]),
+		}) + "\n")
+
+## Graphviz DOT, with parallel edges between two nodes merged like render_graph does
+def write_dot(graph: DependencyGraph, stream):
+	stream.write("// Dependency Graph\ndigraph {\n")
+	for ID in graph:
+		stream.write("\t{ID}\n".format(ID=dot_id(ID)))
+	for src in range(len(graph.nodes)):
+		targets = set()     # only the current node's targets are held at any time
+		for edge in graph.node_edges(src):
+			dst = graph.edge_dst[edge]
+			if dst not in targets and not graph.edge_labels[edge] & REMOVED:
+				targets.add(dst)
+				stream.write("\t{src} -> {dst}\n".format(src=dot_id(graph.nodes[src]), dst=dot_id(graph.nodes[dst])))
+	stream.write("}\n")
+
+## GraphML with the import name, alias and labels as edge data
+def write_graphml(graph: DependencyGraph, stream):
+	from xml.sax.saxutils import escape, quoteattr # Imported lazily since it pulls in urllib and email at startup
+	stream.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+	stream.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+	for key in ["name", "alias", "labels"]:
+		stream.write('  <key id="{key}" for="edge" attr.name="{key}" attr.type="string"/>\n'.format(key=key))
+	stream.write('  <graph id="dependencies" edgedefault="directed">\n')
+	for ID in graph:
+		stream.write('    <node id={ID}/>\n'.format(ID=quoteattr(ID)))
+	for src, edge in iter_edges(graph):
+		stream.write('    <edge source={src} target={dst}>'.format(src=quoteattr(graph.nodes[src]), dst=quoteattr(graph.edge_target(edge))))
+		stream.write('<data key="name">{name}</data><data key="alias">{alias}</data><data key="labels">{labels}</data></edge>\n'.format(
+			name=escape(graph.names[graph.edge_name[edge]]),
+			alias=escape(graph.edge_alias_name(edge)),
+			labels=escape(",".join(label_names(graph.edge_labels[edge]))),
+		))
+	stream.write('  </graph>\n</graphml>\n')
+
+## Compact binary edge list, see BINARY_MAGIC for the layout; stream must be opened in binary mode
+def write_binary(graph: DependencyGraph, stream):
+	stream.write(BINARY_MAGIC + struct.pack("<II", BINARY_VERSION, len(graph.nodes)))
+	for ID in graph:
+		encoded = ID.encode('utf8')
+		stream.write(struct.pack("<I", len(encoded)) + encoded)
+	stream.write(struct.pack("<I", graph.edge_count()))
+	edge_struct = struct.Struct("<IIB")
+	for src, edge in iter_edges(graph):
+		stream.write(edge_struct.pack(src, graph.edge_dst[edge], graph.edge_labels[edge] & ~REMOVED))
+
+## Exporters by output format, and whether each writes bytes rather than text
+EXPORTERS = {
+	"jsonl": (write_jsonl, False),
+	"dot": (write_dot, False),
+	"graphml": (write_graphml, False),
+	"binary": (write_binary, True),
+}
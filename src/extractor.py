@@ -0,0 +1,245 @@
+import time
+import hashlib
+import logging
+from tree_sitter import Node as TreeSitterNode
+from parser import Parser
+from stats import NULL_STATS
+from prefetch import read_file
+
+TOKEN_TYPES = frozenset(["identifier", "attribute"])     # nodes which may reference an imported name
+SCANNED_TYPES = frozenset([                             # statements whose bodies a fast scan searches for imports
+	"if_statement", "elif_clause", "else_clause", "try_statement", "except_clause", "finally_clause",
+	"with_statement", "for_statement", "while_statement", "block",
+])  # function and class bodies are left out, since their imports only run when called
+
+CONTINUATION_PREFIXES = (b"except", b"else", b"elif", b"finally", b")", b"]", b"}")  # column 0 lines which continue a statement
+
+## Length of the smallest prefix of source which ends with a complete top level statement and holds every import keyword
+## Continues from the line of the last import to the next line at column 0 which starts a new statement
+def import_prefix_length(source: bytes) -> int:
+	end = source.find(b"\n", source.rfind(b"import")) + 1
+	while 0 < end < len(source):
+		first = source[end:end + 1]
+		if first not in b" \t\r\n#" and not source.startswith(CONTINUATION_PREFIXES, end):
+			return end
+		end = source.find(b"\n", end) + 1
+	return len(source)
+
+## File contains information about a particular file
+class File():
+	def __init__(self, filepath: str, source: memoryview):
+		self.filepath = filepath
+		self.source = source        # the file's bytes, which tree-sitter byte offsets index into
+
+## RawImport is a single import exactly as written in a file, before it is resolved
+class RawImport():
+	def __init__(self, dotted_name: str, context="", alias="", wildcard=False):
+		self.dotted_name = dotted_name  # imported name (the module itself for wildcard imports)
+		self.context = context          # module named by an import 'from' statement
+		self.alias = alias              # identifier bound by the import, empty if none was given
+		self.wildcard = wildcard        # whether the import binds no name of its own
+
+	def to_list(self) -> list:
+		return [self.dotted_name, self.context, self.alias, self.wildcard]
+
+	@staticmethod
+	def from_list(values: list):
+		return RawImport(*values)
+
+## FileImports holds everything the analyzer needs from a file's parse tree
+class FileImports():
+	def __init__(self, filepath: str, digest: str, imports: list, used=None):
+		self.filepath = filepath    # path of the parsed file
+		self.digest = digest        # content hash of the parsed source
+		self.imports = imports      # list of RawImport in source order
+		self.used = used            # aliases referenced after being imported, None if not collected
+
+	def to_dict(self) -> dict:
+		return {
+			"digest": self.digest,
+			"imports": [raw_import.to_list() for raw_import in self.imports],
+			"used": sorted(self.used) if self.used is not None else None,
+		}
+
+	@staticmethod
+	def from_dict(filepath: str, values: dict):
+		imports = [RawImport.from_list(raw_import) for raw_import in values["imports"]]
+		used = set(values["used"]) if values["used"] is not None else None
+		return FileImports(filepath, values["digest"], imports, used)
+
+## Extractor walks a file's parse tree and collects its imports and the identifiers it uses
+class Extractor():
+	def __init__(self, parser: Parser, stats=NULL_STATS):
+		self.parser = parser
+		self.stats = stats          # records read, parse and extraction times
+		self.prefetcher = None      # reads files ahead of the walk, if set
+		self.import_delegate = {    # delegates each identifier to a handler
+			"dotted_name": self.extract_dotted_import,
+			"aliased_import": self.extract_aliased_import,
+			"wildcard_import": self.extract_wildcard_import,
+		}
+		for value in ["import", ",", "(", ")"]:
+			self.import_delegate[value] = lambda x,y,z: None
+
+	## Check if a tree-sitter node is an import statement
+	def is_import(self, tree_sitter_node: TreeSitterNode) -> bool:
+		return tree_sitter_node.type == "import_statement" or tree_sitter_node.type == "import_from_statement"
+
+	## Extract string from file given a node's start and end bytes, decoding only the node's own bytes
+	def extract_string(self, tree_sitter_node: TreeSitterNode, source: memoryview) -> str:
+		return str(source[tree_sitter_node.start_byte:tree_sitter_node.end_byte], 'utf8')
+
+	## Extracts the string corresponding to a dotted name node, skipping any whitespace between its parts
+	def extract_dotted_name(self, dotted_name_node: TreeSitterNode, source: memoryview) -> str:
+		start, end = dotted_name_node.start_byte, dotted_name_node.end_byte
+		children = dotted_name_node.children
+		if sum(child.end_byte - child.start_byte for child in children) == end - start:
+			return str(source[start:end], 'utf8') # Contiguous, as nearly every dotted name is
+		return str(b"".join(source[child.start_byte:child.end_byte] for child in children), 'utf8')
+
+	## Extract a plain import, optionally within the context of an import 'from' statement
+	def extract_dotted_import(self, file: File, dotted_name_node: TreeSitterNode, context_node: TreeSitterNode, alias="") -> RawImport:
+		dotted_name = self.extract_dotted_name(dotted_name_node, file.source)
+		context = self.extract_dotted_name(context_node, file.source) if context_node else ""
+		return RawImport(dotted_name, context=context, alias=alias)
+
+	## Extract alias and handle import normally
+	def extract_aliased_import(self, file: File, tree_sitter_node: TreeSitterNode, context_node: TreeSitterNode) -> RawImport:
+		dotted_name_node, as_node, alias_node = tree_sitter_node.children
+		alias = self.extract_string(alias_node, file.source)
+		return self.extract_dotted_import(file, dotted_name_node, context_node, alias=alias)
+
+	## Treat a wildcard import like a normal import of its module, which binds no name
+	def extract_wildcard_import(self, file: File, tree_sitter_node: TreeSitterNode, context_node: TreeSitterNode) -> RawImport:
+		dotted_name = self.extract_dotted_name(context_node, file.source)
+		return RawImport(dotted_name, wildcard=True)
+
+	## Handle each kind of import differently
+	def delegate_import(self, file: File, import_children: list, context_node: TreeSitterNode) -> list:
+		raw_imports = []
+		for node in import_children:
+			if node.type in self.import_delegate:
+				raw_import = self.import_delegate[node.type](file, node, context_node)
+				if raw_import:
+					raw_imports.append(raw_import)
+			else:
+				logging.error("Unknown node type {nodetype} within import statement".format(nodetype=node.type))
+		return raw_imports
+
+	## Extract an import statement by differentiating between normal imports and imports 'from'
+	def extract_import(self, file: File, tree_sitter_node: TreeSitterNode) -> list:
+		context_node = None
+		import_children = tree_sitter_node.children
+
+		# If node is an import from statement, define context and adjust children
+		if tree_sitter_node.type == "import_from_statement":
+			context_node = import_children[1]
+			import_children = import_children[2:]
+
+		return self.delegate_import(file, import_children, context_node)
+
+	## Walk a statement with a tree cursor and add every alias it references to used
+	## Tokens are compared as byte slices of the source, and only when their length matches some alias
+	def collect_used(self, tree_sitter_node: TreeSitterNode, source: memoryview, aliases: set, alias_lengths: set, used: set):
+		cursor = tree_sitter_node.walk()
+		remaining = len(aliases) - len(used)
+		while True:
+			node = cursor.node
+			if node.type in TOKEN_TYPES:
+				start, end = node.start_byte, node.end_byte
+				if end - start in alias_lengths:
+					token = source[start:end]
+					if token in aliases and token not in used:
+						used.add(token.tobytes())
+						remaining -= 1
+						if remaining == 0:
+							return
+			if cursor.goto_first_child():
+				continue
+			while not cursor.goto_next_sibling():
+				if not cursor.goto_parent():
+					return
+
+	## Parse a file and extract its imports, plus the imported names it uses if requested
+	## source is the file's contents if the caller already read them
+	def extract_file(self, filepath: str, mark_unused: bool, source=None) -> FileImports:
+		start = time.perf_counter() if self.stats.enabled else 0
+		if source is None:
+			source = self.read_source(filepath)
+		with self.stats.phase("parse"):
+			tree = self.parser.parse_bytes(source)
+		with self.stats.phase("extract"):
+			file_imports = self.extract_tree(filepath, source, tree, mark_unused)
+		if self.stats.enabled:
+			self.stats.record_file(filepath, time.perf_counter() - start, len(source))
+		return file_imports
+
+	## Extract imports only, without collecting used names, for a fast pass over many files
+	## Files which never mention import are not parsed, and the rest only up to their last import. Imports
+	## nested in module level blocks such as try or if TYPE_CHECKING are found by walking statements only,
+	## and the tree is dropped once scanned
+	def scan_file(self, filepath: str, source=None) -> FileImports:
+		start = time.perf_counter() if self.stats.enabled else 0
+		if source is None:
+			source = self.read_source(filepath)
+		digest = hashlib.sha1(source).hexdigest()
+		if b"import" not in source:
+			self.stats.count("files_skipped")
+			return FileImports(filepath, digest, [])
+
+		# Parse only up to the statement holding the last import, unless the cut left the prefix malformed
+		with self.stats.phase("parse"):
+			end = import_prefix_length(source)
+			root_node = self.parser.parse_bytes(source[:end] if end < len(source) else source).root_node
+			if end < len(source) and root_node.has_error:
+				self.stats.count("prefix_fallbacks")
+				root_node = self.parser.parse_bytes(source).root_node
+		with self.stats.phase("extract"):
+			imports = self.scan_imports(File(filepath, memoryview(source)), root_node)
+		if self.stats.enabled:
+			self.stats.record_file(filepath, time.perf_counter() - start, len(source))
+		return FileImports(filepath, digest, imports)
+
+	## Collect import statements in source order, descending only into blocks that may hold them
+	def scan_imports(self, file: File, root_node: TreeSitterNode) -> list:
+		imports = []
+		stack = root_node.children[::-1]
+		while stack:
+			node = stack.pop()
+			if self.is_import(node):
+				imports += self.extract_import(file, node)
+			elif node.type in SCANNED_TYPES:
+				stack += node.children[::-1]
+		return imports
+
+	## Read a file's source as bytes in one unbuffered read sized from the file, which is the only copy kept,
+	## or take it from the prefetcher
+	def read_source(self, filepath: str) -> bytes:
+		with self.stats.phase("read"):
+			source = self.prefetcher.take(filepath) if self.prefetcher else read_file(filepath)
+		self.stats.count("files_parsed")
+		self.stats.count("bytes_read", len(source))
+		return source
+
+	## Extract imports, plus the imported names used if requested, from an already parsed file
+	def extract_tree(self, filepath: str, source: bytes, tree, mark_unused: bool) -> FileImports:
+		digest = hashlib.sha1(source).hexdigest()
+		source_view = memoryview(source)
+		file = File(filepath, source_view)
+
+		imports = []
+		aliases, alias_lengths, used = set(), set(), set()
+		for node in tree.root_node.children:
+			if self.is_import(node):
+				raw_imports = self.extract_import(file, node)
+				imports += raw_imports
+				for raw_import in raw_imports:
+					if not raw_import.wildcard:
+						alias = (raw_import.alias or raw_import.dotted_name).encode('utf8')
+						aliases.add(alias)
+						alias_lengths.add(len(alias))
+			elif mark_unused and len(used) < len(aliases):
+				self.collect_used(node, source_view, aliases, alias_lengths, used)
+
+		used_imports = {alias.decode('utf8') for alias in used} if mark_unused else None
+		return FileImports(filepath, digest, imports, used_imports)
@@ -0,0 +1,280 @@
+import array
+
+## Label bit flags stored per edge
+STDLIB = 1
+SITE_PACKAGE = 2
+UNUSED = 4
+CYCLE = 8               # only set on views, for nodes inside an import cycle
+REMOVED = 128           # tombstone for edges dropped since the last freeze
+
+LABEL_FLAGS = [(STDLIB, "stdlib"), (SITE_PACKAGE, "site_package"), (UNUSED, "unused"), (CYCLE, "cycle")]
+
+KEY_WIDTH = 32          # bits per component of a packed edge key
+
+## Node represents a file or package that is imported
+class Node():
+    def __init__(self, name: str, ID: str, labels=None, alias=""):
+        self.name = name        # name used by the importing file
+        self.ID = ID            # filepath or package name which uniquely identifies the file
+        self.labels = labels if labels is not None else []  # metadata about the node (e.g. 'stdlib' or 'unused')
+        self.alias = alias      # alias used by importing file
+
+    def __str__(self):
+        name_string = self.name
+        if len(self.name) >= 2 and self.name[0] == "." and self.name[:2] != "..":
+            name_string = self.name[1:]
+        label_string = " ({label})".format(label=", ".join(self.labels)) if self.labels else ""
+        return "{name_string}{label_string}".format(name_string=name_string, label_string=label_string)
+
+    def __hash__(self):
+      return hash((self.name, self.ID, len(self.labels), self.alias))
+
+    def add_label(self, label):
+        self.labels.append(label)
+
+## Convert label names to bit flags
+def label_flags(labels: list) -> int:
+    flags = 0
+    for flag, label in LABEL_FLAGS:
+        if label in labels:
+            flags |= flag
+    return flags
+
+## Convert bit flags to label names
+def label_names(flags: int) -> list:
+    return [label for flag, label in LABEL_FLAGS if flags & flag]
+
+## StringTable interns strings as consecutive integer IDs
+class StringTable():
+    def __init__(self):
+        self.ids = {}           # string -> ID
+        self.strings = []       # ID -> string
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, index: int) -> str:
+        return self.strings[index]
+
+    ## Return the ID for a string, adding it to the table if needed
+    def intern(self, string: str) -> int:
+        index = self.ids.get(string)
+        if index is None:
+            index = len(self.strings)
+            self.ids[string] = index
+            self.strings.append(string)
+        return index
+
+    ## Return the ID for a string, or -1 if it was never interned
+    def lookup(self, string: str) -> int:
+        return self.ids.get(string, -1)
+
+## DependencyGraph stores nodes as interned integers and edges as parallel arrays
+## While mutable each node keeps arrays of its edge indices; freeze() compacts everything into CSR form,
+## where node u's edges occupy the range [out_offsets[u], out_offsets[u+1]) of the edge columns
+class DependencyGraph():
+    def __init__(self):
+        self.nodes = StringTable()              # node IDs (file paths or library names)
+        self.names = StringTable()              # import names and aliases
+        self.edge_src = array.array('i')        # edge columns, indexed by edge
+        self.edge_dst = array.array('i')
+        self.edge_name = array.array('i')
+        self.edge_alias = array.array('i')
+        self.edge_labels = array.array('B')
+
+        self.out_edges = []                     # node -> array of outgoing edges, while mutable
+        self.in_edges = []                      # node -> array of incoming edges, while mutable
+
+        self.out_offsets = None                 # CSR offsets into the edge columns, while frozen
+        self.in_offsets = None                  # CSR offsets into in_index, while frozen
+        self.in_index = None                    # incoming edges grouped by target, while frozen
+        self.frozen = False
+        self.removed = 0                        # edges removed since the last freeze, still taking up the edge columns
+        self.version = 0                        # bumped on every change to nodes or edges, so derived indexes can tell they are stale
+
+    def __contains__(self, ID: str) -> bool:
+        return ID in self.nodes.ids
+
+    def __iter__(self):
+        return iter(self.nodes.strings)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    ## Node views for the edges leaving the given node
+    def __getitem__(self, ID: str) -> list:
+        return [self.edge_view(edge) for edge in self.edges(ID)]
+
+    ## Number of live edges
+    def edge_count(self) -> int:
+        return sum(1 for flags in self.edge_labels if not flags & REMOVED)
+
+    ## Pack the components identifying an edge among its source's edges into a single dictionary key
+    def edge_key(self, dst: int, name: int, alias: int) -> int:
+        return ((dst << KEY_WIDTH | name) << KEY_WIDTH) | alias
+
+    ## Add a node if it is not already present and return its index
+    def add_node(self, ID: str) -> int:
+        if self.frozen and ID not in self.nodes.ids:
+            self.thaw()
+        index = self.nodes.intern(ID)
+        if index == len(self.out_edges) and not self.frozen:
+            self.out_edges.append(array.array('i'))
+            self.in_edges.append(array.array('i'))
+            self.version += 1
+        return index
+
+    ## Add an edge unless an identical one exists and return its index
+    ## keys maps edge_key to edge for the source's edges, held by a caller adding all of a source's edges at once,
+    ## so that no index over every edge is needed; without it the source's edges are searched instead
+    def add_edge(self, src_ID: str, name: str, dst_ID: str, alias: str, labels: int, keys=None) -> int:
+        if self.frozen:
+            self.thaw()
+        src = self.add_node(src_ID)
+        dst = self.add_node(dst_ID)
+        name_index = self.names.intern(name)
+        alias_index = self.names.intern(alias)
+        if keys is None:
+            for edge in self.out_edges[src]:
+                if self.edge_dst[edge] == dst and self.edge_name[edge] == name_index and self.edge_alias[edge] == alias_index:
+                    return edge
+        else:
+            key = self.edge_key(dst, name_index, alias_index)
+            edge = keys.get(key)
+            if edge is not None:
+                return edge
+
+        edge = len(self.edge_src)
+        self.edge_src.append(src)
+        self.edge_dst.append(dst)
+        self.edge_name.append(name_index)
+        self.edge_alias.append(alias_index)
+        self.edge_labels.append(labels)
+        self.out_edges[src].append(edge)
+        self.in_edges[dst].append(edge)
+        if keys is not None:
+            keys[key] = edge
+        self.version += 1
+        return edge
+
+    ## Drop every edge leaving the given node
+    def remove_edges(self, ID: str):
+        if ID not in self.nodes.ids:
+            return
+        if self.frozen:
+            self.thaw()
+        src = self.nodes.ids[ID]
+        for edge in self.out_edges[src]:
+            self.edge_labels[edge] |= REMOVED
+            in_edges = self.in_edges[self.edge_dst[edge]]
+            del in_edges[in_edges.index(edge)]
+        self.removed += len(self.out_edges[src])
+        self.out_edges[src] = array.array('i')
+        self.version += 1
+
+    ## Edge indices leaving the given node
+    def edges(self, ID: str):
+        src = self.nodes.lookup(ID)
+        if src < 0:
+            return ()
+        return self.node_edges(src)
+
+    ## Edge indices leaving the node with the given index
+    def node_edges(self, src: int):
+        if self.frozen:
+            return range(self.out_offsets[src], self.out_offsets[src + 1])
+        return self.out_edges[src]
+
+    ## Edge indices entering the given node
+    def incoming_edges(self, ID: str):
+        dst = self.nodes.lookup(ID)
+        if dst < 0:
+            return ()
+        if self.frozen:
+            return self.in_index[self.in_offsets[dst]:self.in_offsets[dst + 1]]
+        return self.in_edges[dst]
+
+    ## IDs of the nodes the given node imports
+    def successors(self, ID: str) -> list:
+        return [self.nodes[self.edge_dst[edge]] for edge in self.edges(ID)]
+
+    ## IDs of the nodes importing the given node
+    def predecessors(self, ID: str) -> list:
+        return [self.nodes[self.edge_src[edge]] for edge in self.incoming_edges(ID)]
+
+    ## Accessors for a single edge's endpoints and alias
+    def edge_source(self, edge: int) -> str:
+        return self.nodes[self.edge_src[edge]]
+
+    def edge_target(self, edge: int) -> str:
+        return self.nodes[self.edge_dst[edge]]
+
+    def edge_alias_name(self, edge: int) -> str:
+        return self.names[self.edge_alias[edge]]
+
+    ## Replace an edge's label flags
+    def set_labels(self, edge: int, labels: int):
+        self.edge_labels[edge] = labels
+
+    ## Build a Node view of an edge, as seen by the importing file
+    def edge_view(self, edge: int, extra_labels=0) -> Node:
+        return Node(
+            name=self.names[self.edge_name[edge]],
+            ID=self.nodes[self.edge_dst[edge]],
+            labels=label_names(self.edge_labels[edge] | extra_labels),
+            alias=self.names[self.edge_alias[edge]],
+        )
+
+    ## Compact the graph into CSR form, dropping removed edges and all per-node bookkeeping
+    def freeze(self):
+        if self.frozen:
+            return
+        node_count = len(self.nodes)
+        order = array.array('i')
+        for edges in self.out_edges:
+            order.extend(edge for edge in edges if not self.edge_labels[edge] & REMOVED)
+
+        # Permute edge columns so that each node's outgoing edges are contiguous
+        self.edge_src = array.array('i', (self.edge_src[edge] for edge in order))
+        self.edge_dst = array.array('i', (self.edge_dst[edge] for edge in order))
+        self.edge_name = array.array('i', (self.edge_name[edge] for edge in order))
+        self.edge_alias = array.array('i', (self.edge_alias[edge] for edge in order))
+        self.edge_labels = array.array('B', (self.edge_labels[edge] for edge in order))
+        self.out_offsets = self.offsets(self.edge_src, node_count)
+
+        # Counting sort of edges by target for the reverse index
+        self.in_offsets = self.offsets(self.edge_dst, node_count)
+        self.in_index = array.array('i', bytes(4 * len(self.edge_dst)))
+        position = array.array('i', self.in_offsets[:-1])
+        for edge, dst in enumerate(self.edge_dst):
+            self.in_index[position[dst]] = edge
+            position[dst] += 1
+
+        self.out_edges, self.in_edges = [], []
+        self.removed = 0
+        self.frozen = True
+
+    ## CSR offsets from the number of edges per node in a column of node indices
+    def offsets(self, column: array.array, node_count: int) -> array.array:
+        counts = array.array('i', bytes(4 * (node_count + 1)))
+        for node in column:
+            counts[node + 1] += 1
+        for node in range(node_count):
+            counts[node + 1] += counts[node]
+        return counts
+
+    ## Restore the mutable per-node bookkeeping so that edges can be added or removed again
+    def thaw(self):
+        if not self.frozen:
+            return
+        self.out_edges = [array.array('i', range(self.out_offsets[node], self.out_offsets[node + 1])) for node in range(len(self.nodes))]
+        self.in_edges = [array.array('i', self.in_index[self.in_offsets[node]:self.in_offsets[node + 1]]) for node in range(len(self.nodes))]
+        self.out_offsets, self.in_offsets, self.in_index = None, None, None
+        self.frozen = False
+
+    ## Bytes held by the edge columns and CSR indices
+    def nbytes(self) -> int:
+        arrays = [self.edge_src, self.edge_dst, self.edge_name, self.edge_alias, self.edge_labels]
+        if self.frozen:
+            arrays += [self.out_offsets, self.in_offsets, self.in_index]
+        return sum(column.itemsize * len(column) for column in arrays)
@@ -0,0 +1,114 @@
+import importlib.machinery
+import json
+import logging
+import os
+import site
+import sys
+import sysconfig
+
+INDEX_VERSION = 1               # bump whenever the index contents or format change
+INDEX_FILENAME = "libraries.json"
+STDLIB = "stdlib"
+SITE_PACKAGE = "site_package"
+
+## LibraryIndex maps the dotted name of every importable library module to its kind
+## It covers builtin modules, the stdlib (including C extensions) and site-packages, and is cached on disk
+## keyed by the interpreter and the modification times of its search path
+class LibraryIndex():
+	def __init__(self, cache_dir: str):
+		self.cache_path = os.path.join(cache_dir, INDEX_FILENAME)
+		self.modules = {}       # dotted module name -> STDLIB or SITE_PACKAGE
+		self.key = self.index_key()
+		if not self.load():
+			self.build()
+			self.save()
+
+	## Returns the kind of library a dotted name refers to, or None if it is not a known library
+	def kind(self, dotted_name: str) -> str:
+		return self.modules.get(dotted_name)
+
+	## Identifies the interpreter and the state of every directory modules can be imported from
+	def index_key(self) -> dict:
+		paths = []
+		for path in self.stdlib_dirs() + self.site_dirs():
+			try:
+				paths.append([path, os.stat(path).st_mtime_ns])
+			except OSError:
+				continue
+		return {"version": INDEX_VERSION, "executable": sys.executable, "paths": paths}
+
+	## Load the index from disk, returning whether it matched the current interpreter
+	def load(self) -> bool:
+		try:
+			with open(self.cache_path, 'r') as fd:
+				contents = json.load(fd)
+		except (OSError, ValueError):
+			return False
+		if contents.get("key") != self.key:
+			return False
+		self.modules = contents["modules"]
+		return True
+
+	## Write the index to disk, which is best effort since the index can always be rebuilt
+	def save(self):
+		try:
+			os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+			temp_path = "{path}.tmp".format(path=self.cache_path)
+			with open(temp_path, 'w') as fd:
+				json.dump({"key": self.key, "modules": self.modules}, fd)
+			os.replace(temp_path, self.cache_path)
+		except OSError as error:
+			logging.warning("Cannot save library index {path}: {error}.".format(path=self.cache_path, error=error))
+
+	## Directories holding the standard library and its C extensions
+	def stdlib_dirs(self) -> list:
+		paths = sysconfig.get_paths()
+		dirs = [paths["stdlib"], paths["platstdlib"], sysconfig.get_config_var("DESTSHARED")]
+		return sorted(set(path for path in dirs if path and os.path.isdir(path)))
+
+	## Directories holding installed distributions
+	def site_dirs(self) -> list:
+		dirs = site.getsitepackages() if hasattr(site, "getsitepackages") else []
+		dirs += [site.getusersitepackages()] if site.ENABLE_USER_SITE else []
+		dirs += [path for path in sys.path if os.path.basename(path) in ("site-packages", "dist-packages")]
+		return sorted(set(path for path in dirs if os.path.isdir(path)))
+
+	## Scan every library directory, letting stdlib modules take precedence over site packages
+	def build(self):
+		logging.info("[LibraryIndex::build] Indexing libraries for {executable}.".format(executable=sys.executable))
+		self.modules = {}
+		for site_dir in self.site_dirs():
+			self.scan(site_dir, "", SITE_PACKAGE)
+		for stdlib_dir in self.stdlib_dirs():
+			self.scan(stdlib_dir, "", STDLIB)
+		for name in sys.builtin_module_names:
+			self.modules[name] = STDLIB
+
+	## Module name for a file, or None if the file cannot be imported
+	def module_name(self, filename: str) -> str:
+		for suffix in importlib.machinery.SOURCE_SUFFIXES + importlib.machinery.EXTENSION_SUFFIXES:
+			if filename.endswith(suffix):
+				name = filename[:-len(suffix)]
+				return name if name.isidentifier() else None
+		return None
+
+	## Record every module and package below a directory under the given dotted prefix
+	def scan(self, directory: str, prefix: str, kind: str):
+		try:
+			entries = list(os.scandir(directory))
+		except OSError:
+			return
+		for entry in entries:
+			if entry.is_dir():
+				# Top-level directories may be namespace packages, nested ones must be regular packages
+				if not entry.name.isidentifier() or entry.name == "__pycache__":
+					continue
+				if prefix and not os.path.isfile(os.path.join(entry.path, "__init__.py")):
+					continue
+				package = prefix + entry.name
+				self.modules[package] = kind
+				self.scan(entry.path, package + ".", kind)
+			else:
+				name = self.module_name(entry.name)
+				if name and name != "__init__":
+					self.modules[prefix + name] = kind
@@ -1,19 +1,38 @@
+import os
 import tree_sitter
 
+## Whether the grammar library is missing or older than any of the grammar sources it is built from
+def needs_build(lib_path, tree_sitter_python_path):
+	if not os.path.isfile(lib_path):
+		return True
+	lib_mtime = os.stat(lib_path).st_mtime
+	try:
+		entries = list(os.scandir(os.path.join(tree_sitter_python_path, 'src')))
+	except OSError:
+		return False # No sources to rebuild from, so use the prebuilt library as is
+	return any(entry.is_file() and entry.stat().st_mtime > lib_mtime for entry in entries)
+
 ## Parser class to interface with tree-sitter
 class Parser():
-	## Initialize tree_sitter Python parser
+	## Initialize tree_sitter Python parser, only compiling the grammar when the prebuilt library is stale
 	def __init__(self, lib_path = 'build/my-languages.so', tree_sitter_python_path = 'tree-sitter-python'):
-		tree_sitter.Language.build_library(
-		  lib_path,
-		  [tree_sitter_python_path]
-		)
+		if needs_build(lib_path, tree_sitter_python_path):
+			tree_sitter.Language.build_library(
+			  lib_path,
+			  [tree_sitter_python_path]
+			)
 		PY_LANGUAGE = tree_sitter.Language(lib_path, 'python')
+		self.lib_path = lib_path
+		self.tree_sitter_python_path = tree_sitter_python_path
 		self.parser = tree_sitter.Parser()
 		self.parser.set_language(PY_LANGUAGE)
 
 	## Returns an abstract syntax tree for the specified file
 	def parse_file(self, file):
-		with open(file, 'r') as fd:
-			contents = fd.read()
-			return self.parser.parse(bytes(contents, 'utf8')), contents.splitlines(True)
\ No newline at end of file
+		with open(file, 'rb', buffering=0) as fd:
+			return self.parse_bytes(fd.readall())
+
+	## Returns an abstract syntax tree for the given utf8 encoded source, reusing an edited old tree if given
+	## Node positions are byte offsets into source, so the source is never decoded as a whole
+	def parse_bytes(self, source, old_tree=None):
+		return self.parser.parse(source, old_tree) if old_tree else self.parser.parse(source)
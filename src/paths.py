@@ -0,0 +1,141 @@
+import collections
+import utils
+from graph import DependencyGraph, Node, CYCLE
+
+## Tarjan's algorithm, run iteratively over the nodes reachable from the given roots
+## Returns the components in reverse topological order and a node -> component map
+def strongly_connected_components(graph: DependencyGraph, roots):
+	index, lowlink = {}, {}
+	stack, on_stack = [], set()
+	components, component_of = [], {}
+	for root in roots:
+		if root in index:
+			continue
+		index[root] = lowlink[root] = len(index)
+		stack.append(root)
+		on_stack.add(root)
+		work = [(root, iter(graph.node_edges(root)))]
+		while work:
+			node, edges = work[-1]
+			for edge in edges:
+				target = graph.edge_dst[edge]
+				if target not in index:
+					index[target] = lowlink[target] = len(index)
+					stack.append(target)
+					on_stack.add(target)
+					work.append((target, iter(graph.node_edges(target))))
+					break
+				elif target in on_stack:
+					lowlink[node] = min(lowlink[node], index[target])
+			else:
+				work.pop()
+				if work:
+					parent = work[-1][0]
+					lowlink[parent] = min(lowlink[parent], lowlink[node])
+				if lowlink[node] == index[node]:
+					members = []
+					while True:
+						member = stack.pop()
+						on_stack.discard(member)
+						component_of[member] = len(components)
+						members.append(member)
+						if member == node:
+							break
+					components.append(members)
+	return components, component_of
+
+## PathEngine answers path queries from a root file over the condensation of its import graph,
+## where every import cycle is collapsed into a single component
+class PathEngine():
+	def __init__(self, graph: DependencyGraph, root_ID: str):
+		self.graph = graph
+		self.root_ID = root_ID
+		self.root = graph.nodes.lookup(root_ID)
+		self.components, self.component_of = strongly_connected_components(graph, [self.root])
+
+		# Edges leaving each component, keeping one per distinct import of the cycle as a whole,
+		# and whether the component is an import cycle
+		self.exits = [[] for _ in self.components]
+		self.cyclic = [len(members) > 1 for members in self.components]
+		for component, members in enumerate(self.components):
+			seen = set()
+			for member in members:
+				for edge in graph.node_edges(member):
+					target = graph.edge_dst[edge]
+					if self.component_of[target] == component:
+						self.cyclic[component] = self.cyclic[component] or target == member
+						continue
+					key = (target, graph.edge_name[edge], graph.edge_alias[edge])
+					if key not in seen:
+						seen.add(key)
+						self.exits[component].append(edge)
+
+	## Number of root-to-leaf paths, counted without enumerating them
+	def count_paths(self) -> int:
+		counts = []
+		for component in range(len(self.components)):
+			exits = self.exits[component]
+			counts.append(sum(counts[self.component_of[self.graph.edge_dst[edge]]] for edge in exits) if exits else 1)
+		return counts[-1]
+
+	## Lazily generate root-to-leaf paths as tuples of nodes, stopping a path at max_depth imports
+	## and the whole walk after max_count paths
+	def iter_paths(self, max_depth=None, max_count=None):
+		graph = self.graph
+		root_component = self.component_of[self.root]
+		root = Node(name=utils.extract_filename(self.root_ID), ID=self.root_ID, labels=["cycle"] if self.cyclic[root_component] else [])
+		if not self.exits[root_component]:
+			yield (root,)
+			return
+
+		count = 0
+		path = [root]
+		stack = [iter(self.exits[root_component])]
+		while stack:
+			edge = next(stack[-1], None)
+			if edge is None:
+				stack.pop()
+				path.pop()
+				continue
+
+			component = self.component_of[graph.edge_dst[edge]]
+			path.append(graph.edge_view(edge, CYCLE if self.cyclic[component] else 0))
+			if not self.exits[component] or (max_depth and len(path) > max_depth):
+				yield tuple(path)
+				path.pop()
+				count += 1
+				if max_count and count >= max_count:
+					return
+			else:
+				stack.append(iter(self.exits[component]))
+
+	## Each import cycle reachable from the root, once, as a closed walk of node IDs
+	def cycles(self) -> list:
+		return [self.cycle_walk(members) for component, members in reversed(list(enumerate(self.components))) if self.cyclic[component]]
+
+	## Shortest walk from the root of a component back to itself, staying inside the component
+	def cycle_walk(self, members: list) -> list:
+		graph = self.graph
+		start = members[-1]
+		component = self.component_of[start]
+		parents = {}
+		queue = collections.deque([start])
+		while queue:
+			node = queue.popleft()
+			for edge in graph.node_edges(node):
+				target = graph.edge_dst[edge]
+				if self.component_of.get(target) != component or target in parents:
+					continue
+				parents[target] = node
+				if target == start:
+					queue.clear()
+					break
+				queue.append(target)
+
+		walk = [start]
+		node = parents[start]
+		while node != start:
+			walk.append(node)
+			node = parents[node]
+		walk.append(start)
+		return [graph.nodes[node] for node in reversed(walk)]
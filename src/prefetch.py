@@ -0,0 +1,85 @@
+import threading
+import collections
+import concurrent.futures
+from stats import NULL_STATS
+
+## Read a whole file as bytes in one unbuffered read
+def read_file(filepath: str) -> bytes:
+	with open(filepath, 'rb', buffering=0) as fd:
+		return fd.readall()
+
+## Prefetcher reads files in a thread pool ahead of the walk, so that parsing consumes buffers already in memory
+## At most window reads are issued and not yet taken, and no new read is issued while the buffers loaded and
+## not yet taken exceed memory_cap bytes (a soft cap, since a file's size is only known once it is read)
+## Requests wait on a stack, so the most recently discovered file, which a depth first walk needs next, goes first
+class Prefetcher():
+	def __init__(self, threads: int, window=64, memory_cap=64 * 2**20, read=read_file, stats=NULL_STATS):
+		self.pool = concurrent.futures.ThreadPoolExecutor(threads)
+		self.window = window
+		self.memory_cap = memory_cap
+		self.read = read                                # reads a file, replaceable to simulate slow storage
+		self.stats = stats
+		self.pending = {}                               # filepath -> future of a read issued and not yet taken
+		self.requested = collections.OrderedDict()      # filepaths waiting for a free slot, most recent last
+		self.buffered = 0                               # bytes loaded and not yet taken
+		self.lock = threading.Lock()                    # guards buffered, which reader threads add to
+
+	## Read a file in a pool thread and account for its buffer
+	def load(self, filepath: str) -> bytes:
+		source = self.read(filepath)
+		with self.lock:
+			self.buffered += len(source)
+		return source
+
+	## Release the buffer of a finished read that will never be taken
+	def release(self, future: concurrent.futures.Future):
+		if not future.cancelled() and future.exception() is None:
+			with self.lock:
+				self.buffered -= len(future.result())
+
+	## Queue files to be read ahead of being taken, given in the order they will be taken
+	def request(self, filepaths: list):
+		for filepath in reversed(filepaths):
+			if filepath not in self.pending:
+				self.requested[filepath] = None
+				self.requested.move_to_end(filepath)
+		self.fill()
+
+	## Issue queued reads while the window and the memory cap allow
+	def fill(self):
+		while self.requested and len(self.pending) < self.window and self.buffered < self.memory_cap:
+			filepath, _ = self.requested.popitem(last=True)
+			self.pending[filepath] = self.pool.submit(self.load, filepath)
+
+	## Return a file's bytes, from its prefetched buffer if it was read ahead or by reading it now
+	def take(self, filepath: str) -> bytes:
+		future = self.pending.pop(filepath, None)
+		self.requested.pop(filepath, None)
+		if future is None:
+			self.stats.count("prefetch_misses")
+			source = self.read(filepath)
+		else:
+			self.stats.count("prefetch_hits" if future.done() else "prefetch_waits")
+			source = future.result()
+			with self.lock:
+				self.buffered -= len(source)
+		self.fill()
+		return source
+
+	## Forget a file which will not be taken, e.g. because its imports were cached
+	def discard(self, filepath: str):
+		self.requested.pop(filepath, None)
+		future = self.pending.pop(filepath, None)
+		if future is not None and not future.cancel():
+			future.add_done_callback(self.release)
+		self.fill()
+
+	## Drop every queued and prefetched file
+	def clear(self):
+		self.requested.clear()
+		for filepath in list(self.pending):
+			self.discard(filepath)
+
+	def close(self):
+		self.clear()
+		self.pool.shutdown(wait=True)
@@ -0,0 +1,121 @@
+import os
+from graph import DependencyGraph, UNUSED, REMOVED
+from exporters import dot_id
+
+OTHERS = "(other)"      # group standing in for every group left out by the node budget
+
+## Group of a node when collapsing at the given depth: its directory, or its top level package if a library
+def cluster_of(ID: str, library: bool, depth: int) -> str:
+	if library:
+		return ".".join(ID.split(".")[:depth]) if depth else "."
+	directory = os.path.dirname(ID)
+	parts = directory.split("/")[:depth] if directory else []
+	return "/".join(parts) + "/" if parts else "./"
+
+## GraphSummary is the graph as it is rendered: groups of collapsed nodes and the edges between them,
+## with the parallel edges between two groups merged into one with a count
+class GraphSummary():
+	def __init__(self):
+		self.groups = {}            # group -> number of graph nodes collapsed into it
+		self.libraries = set()      # groups made only of libraries
+		self.focused = set()        # groups within a focus prefix, kept first under the node budget
+		self.edges = {}             # (source group, target group) -> [imports, unused imports]
+		self.hidden = 0             # graph nodes left out, as hidden libraries or beyond the node budget
+
+	## Record an edge between two groups, unless it stays within one
+	def add_edge(self, src: str, dst: str, imports: int, unused: int):
+		if src != dst:
+			counts = self.edges.setdefault((src, dst), [0, 0])
+			counts[0] += imports
+			counts[1] += unused
+
+	## Keep the max_nodes - 1 groups with focused groups first, then those with the most imports,
+	## and fold the rest into a single group
+	def limit(self, max_nodes: int) -> "GraphSummary":
+		if not max_nodes or len(self.groups) <= max_nodes:
+			return self
+		degree = dict.fromkeys(self.groups, 0)
+		for (src, dst), (imports, _) in self.edges.items():
+			degree[src] += imports
+			degree[dst] += imports
+		ranked = sorted(self.groups, key=lambda group: (group not in self.focused, -degree[group], group))
+		kept = set(ranked[:max(max_nodes - 1, 0)])
+
+		limited = GraphSummary()
+		limited.groups = {group: self.groups[group] for group in ranked if group in kept}
+		limited.libraries = self.libraries & kept
+		limited.focused = self.focused & kept
+		limited.groups[OTHERS] = sum(self.groups[group] for group in ranked if group not in kept)
+		limited.hidden = self.hidden + limited.groups[OTHERS]
+		for (src, dst), (imports, unused) in self.edges.items():
+			limited.add_edge(src if src in kept else OTHERS, dst if dst in kept else OTHERS, imports, unused)
+		return limited
+
+## Summarize a graph for rendering
+## Nodes are collapsed into their directory, or top level package for libraries, at cluster_depth if given,
+## except those under a focus prefix, which are shown one by one to drill down into a subtree
+## Libraries and unresolved imports are left out with hide_libraries, and at most max_nodes groups are kept if given
+def summarize(graph: DependencyGraph, cluster_depth=None, hide_libraries=False, max_nodes=None, focus=None) -> GraphSummary:
+	focus = tuple(focus or ())
+	node_count = len(graph.nodes)
+	# Local imports are always Python files, since packages are expanded into their modules, while libraries
+	# are named by their dotted name; edge labels cannot tell them apart once an import is marked unused
+	library = [ID[-3:] != ".py" for ID in graph.nodes.strings]
+
+	summary = GraphSummary()
+	group_of = [None] * node_count
+	for node, ID in enumerate(graph.nodes.strings):
+		if hide_libraries and library[node]:
+			summary.hidden += 1
+			continue
+		focused = bool(focus) and ID.startswith(focus)
+		group = ID if focused or cluster_depth is None else cluster_of(ID, library[node], cluster_depth)
+		group_of[node] = group
+		if group not in summary.groups:
+			summary.groups[group] = 0
+			if library[node]:
+				summary.libraries.add(group)
+		elif not library[node]:
+			summary.libraries.discard(group)
+		summary.groups[group] += 1
+		if focused:
+			summary.focused.add(group)
+
+	for src in range(node_count):
+		src_group = group_of[src]
+		if src_group is None:
+			continue
+		for edge in graph.node_edges(src):
+			flags = graph.edge_labels[edge]
+			dst_group = group_of[graph.edge_dst[edge]]
+			if dst_group is not None and not flags & REMOVED:
+				summary.add_edge(src_group, dst_group, 1, 1 if flags & UNUSED else 0)
+	return summary.limit(max_nodes)
+
+## Label of a group: its name, with the number of nodes it collapses if more than one
+def group_label(summary: GraphSummary, group: str) -> str:
+	count = summary.groups[group]
+	if group == OTHERS:
+		return "{count} more modules".format(count=count)
+	return "{group}\\n{count} modules".format(group=group, count=count) if count > 1 else group
+
+## Graphviz DOT of a summary: collapsed groups as boxes, libraries dashed, merged edges labelled with their
+## number of imports and dashed if every one of them is unused
+def write_summary_dot(summary: GraphSummary, stream):
+	stream.write("// Dependency Graph\ndigraph {\n")
+	for group, count in summary.groups.items():
+		attributes = ['label="{label}"'.format(label=group_label(summary, group).replace('"', '\\"'))]
+		if count != 1:
+			attributes.append("shape=box")
+		if group in summary.libraries:
+			attributes.append("style=dashed")
+		stream.write("\t{ID} [{attributes}]\n".format(ID=dot_id(group), attributes=" ".join(attributes)))
+	for (src, dst), (imports, unused) in summary.edges.items():
+		attributes = []
+		if imports > 1:
+			attributes.append('label="{imports}"'.format(imports=imports))
+		if unused == imports:
+			attributes.append("style=dashed")
+		stream.write("\t{src} -> {dst}{attributes}\n".format(src=dot_id(src), dst=dot_id(dst),
+			attributes=" [{attributes}]".format(attributes=" ".join(attributes)) if attributes else ""))
+	stream.write("}\n")
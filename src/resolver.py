@@ -0,0 +1,146 @@
+import os
+import utils
+import libindex
+from libindex import LibraryIndex
+
+## Kinds of resolution
+MODULE = "module"           # a local Python file
+PACKAGE = "package"         # a local directory with an __init__.py, whose modules are all imported
+LIBRARY = "library"         # a stdlib module or site package
+UNRESOLVED = "unresolved"   # neither a local file nor a known library
+
+## Kinds of directory entries
+FILE = "file"               # a regular file, or a symlink to one
+DIRECTORY = "directory"     # a directory, or a symlink to one
+OTHER = "other"             # anything else, e.g. a dangling symlink, a FIFO or a socket
+
+## Resolution is the outcome of resolving one import
+class Resolution():
+	def __init__(self, kind: str, name: str, qualified_name: str, path="", label="", branch=""):
+		self.kind = kind                        # one of the kinds above
+		self.branch = branch or kind            # which check of the resolver matched, for statistics
+		self.name = name                        # name recorded for the import in the graph
+		self.qualified_name = qualified_name    # full dotted name of the import including its context
+		self.path = path                        # normalized path of the module or package, if local
+		self.label = label                      # library label, if a library
+
+## Resolver resolves imports against snapshots of directory listings, each read once with scandir,
+## and memoizes every (parent directory, context, dotted name) it has resolved
+class Resolver():
+	def __init__(self, libraries: LibraryIndex):
+		self.libraries = libraries
+		self.listings = {}      # normalized directory -> {entry name: entry kind}, None if missing
+		self.memo = {}          # (parent_dir, context, dotted_name) -> Resolution
+		self.stat_calls = 0     # filesystem calls made to build listings
+		self.memo_hits = 0
+
+	## Read a directory listing from the filesystem
+	def list_directory(self, dirpath: str) -> dict:
+		self.stat_calls += 1
+		try:
+			with os.scandir(dirpath) as entries:
+				return {entry.name: FILE if entry.is_file() else DIRECTORY if entry.is_dir() else OTHER for entry in entries}
+		except OSError:
+			return None
+
+	## Snapshot of a directory listing, read on first use
+	def listing(self, dirpath: str) -> dict:
+		dirpath = utils.get_normal_path(dirpath)
+		if dirpath not in self.listings:
+			self.listings[dirpath] = self.list_directory(dirpath)
+		return self.listings[dirpath]
+
+	## Kind of entry the snapshot of a path's directory lists it as, or None if it is not listed
+	def entry_kind(self, path: str):
+		dirname, basename = os.path.split(utils.get_normal_path(path))
+		listing = self.listing(dirname or ".")
+		return listing.get(basename) if listing else None
+
+	## Checks if file path is valid python
+	def is_valid_module(self, filepath: str) -> bool:
+		return bool(filepath) and filepath[-3:] == ".py" and self.entry_kind(filepath) == FILE
+
+	## Checks if folder path is valid python
+	def is_valid_package(self, package_path: str) -> bool:
+		init_filepath = "{package_path}/__init__.py".format(package_path=package_path)
+		return self.entry_kind(package_path) == DIRECTORY and self.is_valid_module(init_filepath)
+
+	## Paths of the Python files directly within a directory
+	def directory_modules(self, dirpath: str) -> list:
+		listing = self.listing(dirpath) or {}
+		return ["{dirpath}/{name}".format(dirpath=dirpath, name=name) for name, kind in listing.items() if kind == FILE and name[-3:] == ".py"]
+
+	## Paths of every regular file below a directory, in the order utils.get_directory_files lists them
+	def directory_files(self, dirpath: str) -> list:
+		files = []
+		for name, kind in (self.listing(dirpath) or {}).items():
+			path = os.path.join(dirpath, name)
+			if kind == DIRECTORY:
+				files += self.directory_files(path)
+			elif kind == FILE:
+				files.append(path)
+		return files
+
+	## Forget snapshots so that filesystem changes are seen, for one path and its directory or for everything
+	def invalidate(self, path=None):
+		if path is None:
+			self.listings = {}
+		else:
+			path = utils.get_normal_path(path)
+			self.listings.pop(path, None)
+			self.listings.pop(os.path.dirname(path) or ".", None)
+		self.memo = {}
+
+	## Resolves an import given some optional context representing a parent absolute or relative module
+	def resolve(self, parent_dir: str, context: str, dotted_name: str) -> Resolution:
+		key = (parent_dir, context, dotted_name)
+		resolution = self.memo.get(key)
+		if resolution is not None:
+			self.memo_hits += 1
+			return resolution
+		resolution = self.resolve_uncached(parent_dir or ".", context, dotted_name)
+		self.memo[key] = resolution
+		return resolution
+
+	def resolve_uncached(self, parent_dir: str, context: str, dotted_name: str) -> Resolution:
+		import_file = utils.get_path(dotted_name)
+		context_dotted_name = dotted_name
+		context_path = parent_dir
+
+		# Process context iff this call corresponds to an import 'from' statement
+		context_dir = utils.get_path(context)
+		context_init_path, context_module_path = "", ""
+		if context_dir:
+			context_path = "{parent_dir}/{context_dir}".format(parent_dir = parent_dir, context_dir=context_dir)
+			context_dotted_name = "{context}.{dotted_name}".format(context=context, dotted_name=dotted_name)
+			context_init_path = "{context_path}/__init__.py".format(context_path = context_path)
+			context_module_path = "{context_path}.py".format(context_path = context_path)
+
+		# Generate possible paths to search
+		package_path = "{context_path}/{import_file}".format(context_path=context_path, import_file = import_file)
+		module_path = "{package_path}.py".format(package_path = package_path)
+
+		# Check if import is a Python file within a local module
+		if self.is_valid_module(module_path):
+			return Resolution(MODULE, context_dotted_name, context_dotted_name, path=utils.get_normal_path(module_path))
+
+		# Check if import is (possibly) an attribute of a local module
+		if self.is_valid_module(context_module_path):
+			return Resolution(MODULE, context, context_dotted_name, path=utils.get_normal_path(context_module_path), branch="module_attribute")
+
+		# Check if import is a local package
+		if self.is_valid_package(package_path):
+			return Resolution(PACKAGE, context_dotted_name, context_dotted_name, path=utils.get_normal_path(package_path))
+
+		# Check if import is (possibly) an attribute of a local module (in the __init__.py file)
+		if self.is_valid_module(context_init_path):
+			return Resolution(MODULE, context_dotted_name, context_dotted_name, path=utils.get_normal_path(context_init_path), branch="package_attribute")
+
+		# Check if import is a library module, or an attribute of one
+		for library_name, branch in [(context_dotted_name, "library"), (context, "library_attribute")]:
+			kind = self.libraries.kind(library_name) if library_name else None
+			if kind:
+				label = "stdlib" if kind == libindex.STDLIB else "site_package"
+				return Resolution(LIBRARY, library_name, context_dotted_name, label=label, branch=branch)
+
+		return Resolution(UNRESOLVED, context if context else dotted_name, context_dotted_name)
@@ -0,0 +1,153 @@
+import copy
+import logging
+import subprocess
+import utils
+from extractor import Extractor, FileImports
+from resolver import Resolver, FILE, DIRECTORY
+
+SUBMODULE_MODE = b"160000"      # tree entries which are commits of other repositories
+SYMLINK_MODE = b"120000"        # tree entries whose blob is a link target rather than source
+
+## GitRepository reads commits, trees and blobs straight from a repository's object store
+class GitRepository():
+	def __init__(self, repo_dir: str):
+		self.repo_dir = repo_dir
+		self.batch = None       # long running 'git cat-file --batch' process, started on first read
+
+	## Output of a git command run in the repository
+	def git(self, *args) -> bytes:
+		return subprocess.run(["git", "-C", self.repo_dir] + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout
+
+	## Full commit ID of a revision
+	## Revisions starting with a dash are rejected here, since git would read them as options and only
+	## git 2.30 and later let rev-parse mark the end of its options
+	def resolve(self, revision: str) -> str:
+		if revision.startswith("-"):
+			raise ValueError("Invalid revision {revision}.".format(revision=revision))
+		return self.git("rev-parse", "--verify", "--quiet", "{revision}^{{commit}}".format(revision=revision)).decode('utf8').strip()
+
+	## Blob ID of every regular file in a commit's tree, by path relative to the repository root
+	def list_tree(self, commit: str) -> dict:
+		blobs = {}
+		for entry in self.git("ls-tree", "-r", "-z", "--full-tree", commit).split(b"\0"):
+			if not entry:
+				continue
+			meta, path = entry.split(b"\t", 1)
+			mode, kind, sha = meta.split(b" ")
+			if kind == b"blob" and mode not in (SUBMODULE_MODE, SYMLINK_MODE):
+				blobs[path.decode('utf8', 'surrogateescape')] = sha.decode('ascii')
+		return blobs
+
+	## Contents of a blob, read through a single batch process shared by every read
+	def read_blob(self, sha: str) -> bytes:
+		if self.batch is None:
+			self.batch = subprocess.Popen(["git", "-C", self.repo_dir, "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+		self.batch.stdin.write(sha.encode('ascii') + b"\n")
+		self.batch.stdin.flush()
+		header = self.batch.stdout.readline().split()
+		if len(header) != 3:
+			raise OSError("Cannot read blob {sha} from {repo}.".format(sha=sha, repo=self.repo_dir))
+		contents = self.batch.stdout.read(int(header[2]))
+		self.batch.stdout.read(1) # Newline terminating each object
+		return contents
+
+	def close(self):
+		if self.batch is not None:
+			self.batch.stdin.close()
+			self.batch.wait()
+			self.batch = None
+
+## RevisionResolver resolves imports against the file listing of a commit's tree instead of the filesystem
+class RevisionResolver(Resolver):
+	def __init__(self, libraries):
+		super().__init__(libraries)
+		self.tree_listings = {}     # normalized directory -> {entry name: entry kind} of the current tree
+
+	## Build directory listings from the paths of a commit's files
+	def set_tree(self, paths):
+		listings = {".": {}}
+		for path in paths:
+			parts = path.split("/")
+			for depth in range(len(parts)):
+				directory = "/".join(parts[:depth]) or "."
+				listings.setdefault(directory, {})[parts[depth]] = DIRECTORY if depth < len(parts) - 1 else FILE
+		self.tree_listings = listings
+		self.invalidate()
+
+	def list_directory(self, dirpath: str) -> dict:
+		self.stat_calls += 1
+		return self.tree_listings.get(dirpath)
+
+## RevisionExtractor reads files as blobs of the current commit and extracts each blob only once,
+## however many commits contain it
+class RevisionExtractor(Extractor):
+	def __init__(self, parser, stats, repository: GitRepository):
+		super().__init__(parser, stats)
+		self.repository = repository
+		self.blobs = {}             # path -> blob ID in the current commit
+		self.memo = {}              # (blob ID, fast scan) -> FileImports of the first path seen with that blob
+
+	## Blob ID of a file in the current commit
+	def blob_of(self, filepath: str) -> str:
+		sha = self.blobs.get(utils.get_normal_path(filepath))
+		if sha is None:
+			raise FileNotFoundError("No file {filepath} in the analyzed revision.".format(filepath=filepath))
+		return sha
+
+	def read_source(self, filepath: str) -> bytes:
+		with self.stats.phase("read"):
+			source = self.repository.read_blob(self.blob_of(filepath))
+		self.stats.count("files_parsed")
+		self.stats.count("bytes_read", len(source))
+		return source
+
+	## Imports extracted from the blob by a previous commit, under this file's path, or None
+	def recall(self, key: tuple, filepath: str, mark_unused: bool) -> FileImports:
+		file_imports = self.memo.get(key)
+		if file_imports is None or (mark_unused and file_imports.used is None):
+			return None
+		self.stats.count("blobs_reused")
+		return FileImports(filepath, file_imports.digest, file_imports.imports, file_imports.used)
+
+	def extract_file(self, filepath: str, mark_unused: bool, source=None) -> FileImports:
+		key = (self.blob_of(filepath), False)
+		file_imports = self.recall(key, filepath, mark_unused)
+		if file_imports is None:
+			file_imports = self.memo[key] = super().extract_file(filepath, mark_unused, source)
+		return file_imports
+
+	def scan_file(self, filepath: str, source=None) -> FileImports:
+		key = (self.blob_of(filepath), True)
+		file_imports = self.recall(key, filepath, False)
+		if file_imports is None:
+			file_imports = self.memo[key] = super().scan_file(filepath, source)
+		return file_imports
+
+## RevisionAnalysis points an analyzer at commits of a git repository, so that its usual runs analyze the
+## files of a commit read from the object store, with paths relative to the repository root
+## Extraction is memoized by blob across commits, which replaces the analyzer's import cache and prefetching
+class RevisionAnalysis():
+	def __init__(self, analyzer, repo_dir: str):
+		self.analyzer = analyzer
+		self.repository = GitRepository(repo_dir)
+		analyzer.extractor = RevisionExtractor(analyzer.parser, analyzer.stats, self.repository)
+		analyzer.resolver = RevisionResolver(analyzer.libraries)
+		analyzer.cache = None
+		if analyzer.prefetcher:
+			analyzer.prefetcher.close()
+		analyzer.prefetcher = None
+		if analyzer.config.jobs > 1:
+			logging.warning("Parsing revisions in a single process, since workers read files from disk.")
+			analyzer.config = copy.copy(analyzer.config) # The config may be shared, e.g. the default Config()
+			analyzer.config.jobs = 1
+
+	## Switch to a revision and return its commit ID
+	def checkout(self, revision: str) -> str:
+		commit = self.repository.resolve(revision)
+		blobs = self.repository.list_tree(commit)
+		self.analyzer.extractor.blobs = blobs
+		self.analyzer.resolver.set_tree(blobs)
+		return commit
+
+	def close(self):
+		self.repository.close()
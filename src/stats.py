@@ -0,0 +1,156 @@
+import io
+import sys
+import json
+import time
+import heapq
+import tracemalloc
+import collections
+
+PROFILERS = ["cprofile", "tracemalloc"]
+PROFILE_LINES = 20      # entries of a profile included in the report
+
+## Phase is a context manager charging the time spent inside it to a named phase
+class Phase():
+	__slots__ = ["stats", "name"]
+
+	def __init__(self, stats, name: str):
+		self.stats = stats
+		self.name = name
+
+	def __enter__(self):
+		self.stats.enter(self.name)
+
+	def __exit__(self, *exc_info):
+		self.stats.exit()
+
+## Stats records wall and CPU time per phase, counters and the slowest files of a run
+## Phases nest, and time is charged only to the innermost active phase so the totals add up to the run
+class Stats():
+	enabled = True
+
+	def __init__(self, top=10, profile=None):
+		self.phases = collections.OrderedDict()     # phase -> [wall seconds, cpu seconds, times entered]
+		self.counters = collections.Counter()
+		self.slowest = []                           # min-heap of (seconds, filepath, bytes) for the slowest files
+		self.top = top                              # number of slowest files kept
+		self.stack = []                             # active phases as [name, wall start, cpu start]
+		self.profile = profile                      # one of PROFILERS, or None
+		self.profiler = None
+		self.profile_report = []                    # profile lines, filled in once profiling stops
+		if profile == "cprofile":
+			import cProfile # Imported lazily, like pstats, since profiling is rare and pstats is slow to import
+			self.profiler = cProfile.Profile()
+			self.profiler.enable()
+		elif profile == "tracemalloc":
+			tracemalloc.start()
+
+	def phase(self, name: str) -> Phase:
+		return Phase(self, name)
+
+	## Add the time since an active phase was last resumed to its totals
+	def charge(self, active: list, wall: float, cpu: float):
+		totals = self.phases.get(active[0])
+		if totals is None:
+			totals = self.phases[active[0]] = [0.0, 0.0, 0]
+		totals[0] += wall - active[1]
+		totals[1] += cpu - active[2]
+
+	## Pause the enclosing phase and start timing a new one
+	def enter(self, name: str):
+		wall, cpu = time.perf_counter(), time.process_time()
+		if self.stack:
+			self.charge(self.stack[-1], wall, cpu)
+		self.stack.append([name, wall, cpu])
+
+	## Stop timing the innermost phase and resume the enclosing one
+	def exit(self):
+		wall, cpu = time.perf_counter(), time.process_time()
+		active = self.stack.pop()
+		self.charge(active, wall, cpu)
+		self.phases[active[0]][2] += 1
+		if self.stack:
+			self.stack[-1][1], self.stack[-1][2] = wall, cpu
+
+	def count(self, name: str, amount=1):
+		self.counters[name] += amount
+
+	## Remember a file if it is among the slowest to read, parse and extract
+	def record_file(self, filepath: str, seconds: float, size: int):
+		if len(self.slowest) < self.top:
+			heapq.heappush(self.slowest, (seconds, filepath, size))
+		elif seconds > self.slowest[0][0]:
+			heapq.heapreplace(self.slowest, (seconds, filepath, size))
+
+	## Stop the profiler, if any, and return its top entries as lines of text
+	def profile_lines(self) -> list:
+		if self.profiler:
+			self.profiler.disable()
+			stream = io.StringIO()
+			import pstats
+			pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_LINES)
+			self.profiler = None
+			self.profile_report = [line for line in stream.getvalue().splitlines() if line.strip()]
+		elif self.profile == "tracemalloc" and tracemalloc.is_tracing():
+			snapshot = tracemalloc.take_snapshot()
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+			self.profile_report = ["peak traced memory: {peak} bytes".format(peak=peak)]
+			self.profile_report += [str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_LINES]]
+		return self.profile_report
+
+	def to_dict(self) -> dict:
+		return {
+			"phases": {name: {"wall": wall, "cpu": cpu, "calls": calls} for name, (wall, cpu, calls) in self.phases.items()},
+			"counters": dict(self.counters),
+			"slowest_files": [{"path": path, "seconds": seconds, "bytes": size} for seconds, path, size in sorted(self.slowest, reverse=True)],
+			"profile": self.profile_lines(),
+		}
+
+	## Print the statistics as aligned tables, or as a single JSON object
+	def report(self, output_format="table", stream=None):
+		stream = stream or sys.stderr
+		stats = self.to_dict()
+		if output_format == "json":
+			print(json.dumps(stats), file=stream)
+			return
+
+		total = sum(phase["wall"] for phase in stats["phases"].values()) or 1
+		print("{phase:<16}{wall:>10}{cpu:>10}{calls:>10}{share:>8}".format(phase="phase", wall="wall ms", cpu="cpu ms", calls="calls", share="share"), file=stream)
+		for name, phase in stats["phases"].items():
+			print("{name:<16}{wall:>10.1f}{cpu:>10.1f}{calls:>10}{share:>8.1%}".format(
+				name=name, wall=1000 * phase["wall"], cpu=1000 * phase["cpu"], calls=phase["calls"], share=phase["wall"] / total), file=stream)
+		print("", file=stream)
+		for name, value in sorted(stats["counters"].items()):
+			print("{name:<32}{value:>10}".format(name=name, value=value), file=stream)
+		if stats["slowest_files"]:
+			print("\nslowest files:", file=stream)
+			for entry in stats["slowest_files"]:
+				print("{ms:>10.1f} ms {size:>10} bytes  {path}".format(ms=1000 * entry["seconds"], size=entry["bytes"], path=entry["path"]), file=stream)
+		if stats["profile"]:
+			print("\n{profile}:".format(profile=self.profile), file=stream)
+			for line in stats["profile"]:
+				print(line, file=stream)
+
+## NullPhase does nothing, so instrumented code costs a single method call when statistics are disabled
+class NullPhase():
+	def __enter__(self):
+		pass
+
+	def __exit__(self, *exc_info):
+		pass
+
+## NullStats stands in for Stats when statistics are disabled
+class NullStats():
+	enabled = False
+	null_phase = NullPhase()
+
+	def phase(self, name: str) -> NullPhase:
+		return self.null_phase
+
+	def count(self, name: str, amount=1):
+		pass
+
+	def record_file(self, filepath: str, seconds: float, size: int):
+		pass
+
+NULL_STATS = NullStats()
@@ -1,4 +1,3 @@
-import distutils.sysconfig as sysconfig
 import os
 
 ## Checks if directory path is valid
@@ -9,19 +8,6 @@ def is_valid_dir(dirpath):
 def is_valid_file(filepath):
 	return os.path.isfile(filepath)
 
-## Checks if file path is valid python
-def is_valid_module(filepath):
-	return os.path.isfile(filepath) and filepath[-3:] == ".py"
-
-## Checks if folder path is valid python
-def is_valid_package(package_path):
-	init_filepath = "{package_path}/__init__.py".format(package_path=package_path)
-	return os.path.exists(package_path) and os.path.isfile(init_filepath)
-
-## Returns contents of given directory
-def get_directory_contents(dirpath):
-	return os.scandir(dirpath)
-
 ## Process dotted name to yield relative path
 def get_path(dotted_name):
 	stripped = dotted_name.strip('.')
@@ -42,9 +28,10 @@ def extract_filename(filepath):
 def extract_parent_directory(filepath):
 	return os.path.dirname(filepath)
 
-## Check if given file is contained within given directory
-def directory_contains_file(dirpath, filepath):
-	directory_files = get_directory_files(dirpath)
+## Check if given file is contained within given directory, reusing the directory's files if already listed
+def directory_contains_file(dirpath, filepath, directory_files=None):
+	if directory_files is None:
+		directory_files = get_directory_files(dirpath)
 	return filepath in directory_files
 
 ## Returns a list of file paths within the specified directory
@@ -57,13 +44,7 @@ def get_directory_files(dirpath):
 			files += get_directory_files(entry.path)
 	return files
 
-## --This function was taken from stack overflow--
-## Get a list of available libraries 
-def get_libraries():
-	lib = set()
-	std_lib = sysconfig.get_python_lib(standard_lib=True)
-	for top, dirs, files in os.walk(std_lib):
-	    for name in files:
-	        if name != '__init__.py' and name[-3:] == '.py':
-	        	lib.add(name)
-	return lib
\ No newline at end of file
+## Default directory for data persisted between runs
+def get_cache_dir():
+	cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+	return os.path.join(cache_home, "dependency-analyzer")